@@ -0,0 +1,155 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from http import HTTPStatus
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from . import metrics
+
+HEALTH_PATHS = frozenset({"/healthy", "/livez", "/readyz", "/metrics", "/cache/stats"})
+RESET_PATH = "/reset"
+
+
+class Priority(IntEnum):
+    """Request classes, the lower the sooner admitted."""
+
+    HEALTH = 0
+    READ = 1
+    WRITE = 2
+    RESET = 3
+
+
+def classify(scope: Scope) -> Priority:
+    path = scope["path"]
+    if path in HEALTH_PATHS:
+        return Priority.HEALTH
+    if path == RESET_PATH:
+        return Priority.RESET
+    if scope["method"] in ("GET", "HEAD", "OPTIONS"):
+        return Priority.READ
+    return Priority.WRITE
+
+
+class _Shed(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+class AdmissionMiddleware:
+    """
+    Admit at most `max_in_flight` requests at once. The others wait in a queue
+    of at most `max_queue` requests, ordered by `Priority` then arrival. A
+    request is shed with a `503 Service Unavailable` and `Retry-After` once it
+    waited `queue_timeout` seconds, or right away if the queue is full of
+    requests of the same or a higher class. A full queue otherwise makes room
+    by shedding its lowest class request.
+
+    Everything runs on the event loop, so the counters need no lock.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        # (priority, arrival, future) of the waiting requests
+        self._queue: list[tuple[Priority, int, asyncio.Future[None]]] = []
+        self._arrivals = itertools.count()
+
+    def _update_gauges(self) -> None:
+        metrics.admission_in_flight.set(self.in_flight)
+        metrics.admission_queue_depth.set(len(self._queue))
+
+    def _remove(self, entry: tuple[Priority, int, asyncio.Future[None]]) -> None:
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+
+    def _shed_lowest(self, priority: Priority) -> bool:
+        """Shed the lowest class waiting request if `priority` outranks it."""
+        lowest = max(self._queue, key=lambda entry: entry[:2], default=None)
+        if lowest is None or lowest[0] <= priority:
+            return False
+        self._remove(lowest)
+        lowest[2].set_exception(_Shed("preempted"))
+        return True
+
+    async def _acquire(self, priority: Priority) -> None:
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self.in_flight += 1
+            return
+
+        if len(self._queue) >= self.max_queue and not self._shed_lowest(priority):
+            raise _Shed("queue_full")
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._arrivals), future)
+        heapq.heappush(self._queue, entry)
+        self._update_gauges()
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if not future.done():
+                self._remove(entry)
+            elif future.exception() is None:
+                # The slot handed over in the meantime goes to the next request.
+                self._release()
+            raise
+        finally:
+            self._update_gauges()
+
+        if not future.done():
+            self._remove(entry)
+            self._update_gauges()
+            raise _Shed("timeout")
+        # Raises if shed by a higher class request.
+        future.result()
+
+    def _release(self) -> None:
+        if self._queue:
+            # The slot goes to the next request as is, `in_flight` stays.
+            *_, future = heapq.heappop(self._queue)
+            future.set_result(None)
+            return
+        self.in_flight -= 1
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_in_flight <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify(scope)
+        start = time.perf_counter()
+        try:
+            await self._acquire(priority)
+        except _Shed as e:
+            metrics.admission_shed_total.inc(priority.name.lower(), e.reason)
+            response = JSONResponse(
+                {"detail": {"error": "Server overloaded, retry later."}},
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        metrics.admission_queue_wait_seconds.observe(
+            time.perf_counter() - start, priority.name.lower()
+        )
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+            self._update_gauges()
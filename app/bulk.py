@@ -0,0 +1,201 @@
+import json
+import tempfile
+from collections import Counter
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from http import HTTPStatus
+from typing import Any, Protocol, TypeVar
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.background import BackgroundTask
+
+from .models import BulkItemOut, BulkItemStatus, BulkOut
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Reports larger than this are spooled to disk instead of being kept in memory.
+_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+M = TypeVar("M", bound=BaseModel)
+T = TypeVar("T")
+
+
+class _Named(Protocol):
+    name: str
+
+
+R = TypeVar("R", bound=_Named)
+
+
+class InvalidBulkPayloadError(ValueError):
+    status_code = HTTPStatus.BAD_REQUEST
+
+
+class BulkPayloadTooLargeError(InvalidBulkPayloadError):
+    status_code = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+def is_ndjson(request: Request) -> bool:
+    return request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE)
+
+
+async def read_items(
+    request: Request, max_array_bytes: int
+) -> Iterable[Any] | AsyncIterable[Any]:
+    """
+    A JSON array body is read and parsed at once, so it's refused beyond
+    `max_array_bytes`. An NDJSON body is returned as an async iterator over its
+    lines, parsed as they arrive. A line which isn't valid JSON is yielded as
+    is, so it's reported as invalid on its own.
+    """
+    if is_ndjson(request):
+        return _aiter_ndjson(request)
+
+    too_large = BulkPayloadTooLargeError(
+        f"A JSON array body is limited to {max_array_bytes} bytes, "
+        f"send larger payloads as {NDJSON_MEDIA_TYPE}."
+    )
+    if int(request.headers.get("content-length", 0)) > max_array_bytes:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_array_bytes:
+            raise too_large
+
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise InvalidBulkPayloadError("Body must be a JSON array.") from e
+    if not isinstance(items, list):
+        raise InvalidBulkPayloadError("Body must be a JSON array.")
+    return items
+
+
+def _loads_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode(errors="replace")
+
+
+async def _aiter_ndjson(request: Request) -> AsyncIterator[Any]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _loads_line(line)
+    if buffer.strip():
+        yield _loads_line(buffer)
+
+
+async def _aiter(items: Iterable[Any] | AsyncIterable[Any]) -> AsyncIterator[Any]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}"
+        for err in e.errors()
+    )
+
+
+async def process_in_chunks(
+    items: Iterable[Any] | AsyncIterable[Any],
+    model: type[M],
+    create_chunk: Callable[[list[tuple[int, M]]], Awaitable[list[BulkItemOut]]],
+    chunk_size: int,
+) -> AsyncIterator[list[BulkItemOut]]:
+    """
+    Validate the items against `model` and hand the valid ones, with their index,
+    to `create_chunk`. The statuses are yielded every `chunk_size` items, ordered
+    by index, so only the current chunk of an NDJSON stream is held in memory.
+    """
+    chunk: list[tuple[int, M]] = []
+    statuses: list[BulkItemOut] = []
+    index = 0
+    async for item in _aiter(items):
+        try:
+            chunk.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            name = item.get("name") if isinstance(item, dict) else None
+            statuses.append(
+                BulkItemOut(
+                    index=index,
+                    name=name if isinstance(name, str) else None,
+                    status=BulkItemStatus.INVALID,
+                    error=_format_validation_error(e),
+                )
+            )
+        index += 1
+
+        if len(chunk) + len(statuses) >= chunk_size:
+            if chunk:
+                statuses.extend(await create_chunk(chunk))
+            yield sorted(statuses, key=lambda status: status.index)
+            chunk, statuses = [], []
+
+    if chunk:
+        statuses.extend(await create_chunk(chunk))
+    if statuses:
+        yield sorted(statuses, key=lambda status: status.index)
+
+
+async def insert_deduplicated(
+    items: list[T],
+    name: Callable[[T], str],
+    insert: Callable[[list[T]], Awaitable[Iterable[R]]],
+) -> list[tuple[T, R | None]]:
+    """
+    Insert `items` in one statement, and pair each of them with the object
+    created for it, or `None` if its name already existed. A name repeated
+    within one statement would conflict with itself, so only its first
+    occurrence is sent, and the later ones are paired with `None` too.
+    """
+    firsts: dict[str, T] = {}
+    for item in items:
+        firsts.setdefault(name(item), item)
+    created = {obj.name: obj for obj in await insert(list(firsts.values()))}
+    return [(item, created.pop(name(item), None)) for item in items]
+
+
+async def bulk_response(
+    request: Request, results: AsyncIterator[list[BulkItemOut]]
+) -> BulkOut | StreamingResponse:
+    """
+    Answer a JSON array with a `BulkOut` report, and an NDJSON stream with one
+    `BulkItemOut` line per item. The NDJSON report is spooled while the request
+    is consumed and sent afterwards, since a response streamed concurrently
+    could compete with the request body for `receive`.
+    """
+    if not is_ndjson(request):
+        counts: Counter[BulkItemStatus] = Counter()
+        items: list[BulkItemOut] = []
+        async for statuses in results:
+            counts.update(status.status for status in statuses)
+            items.extend(statuses)
+        return BulkOut(
+            **{status.value: count for status, count in counts.items()}, items=items
+        )
+
+    report = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    async for statuses in results:
+        report.write(
+            "".join(
+                status.model_dump_json(exclude_none=True) + "\n" for status in statuses
+            ).encode()
+        )
+    report.seek(0)
+    return StreamingResponse(
+        iter(lambda: report.read(64 * 1024), b""),
+        media_type=NDJSON_MEDIA_TYPE,
+        background=BackgroundTask(report.close),
+    )
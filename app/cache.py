@@ -0,0 +1,249 @@
+import asyncio
+import contextvars
+import dataclasses
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any
+
+import edgedb
+
+from . import metrics
+from .etags import make_etag
+from .executors import JSONExecutor
+from .queries import get_event_by_name_async_edgeql as get_event_by_name_qry
+from .queries import get_events_async_edgeql as get_events_qry
+from .queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from .queries import get_users_async_edgeql as get_users_qry
+
+# (query module, JSON mode, sorted keyword arguments)
+CacheKey = tuple[str, bool, tuple[tuple[str, Hashable], ...]]
+
+
+@dataclasses.dataclass(slots=True)
+class _Entry:
+    expires_at: float
+    value: Any
+    # Computed by the first `fetch_with_etag` of the entry, then reused.
+    etag: str | None = None
+
+
+@dataclasses.dataclass(slots=True, eq=False)
+class _Flight:
+    """A query running for a key, which the misses of that key wait for."""
+
+    # The time of the queries run, reported by every request waiting.
+    db_time: metrics.RequestDBTime
+    task: asyncio.Task[_Entry] = dataclasses.field(init=False)
+    # Set if the key is invalidated while the query runs, so a read which
+    # started before a write doesn't store what it fetched.
+    stale: bool = False
+
+
+class QueryCache:
+    """
+    An in-process LRU cache for the results of the generated query functions,
+    keyed by the query module, the executor mode (objects or JSON) and the
+    keyword arguments. An entry expires `ttl` seconds after it was stored, or
+    `negative_ttl` seconds if the query found nothing, and the least recently
+    used entry is evicted once `max_size` is exceeded.
+
+    The cache doesn't know which rows a write touches, so the write handlers
+    invalidate the affected entries themselves, see `invalidate_users` and
+    `invalidate_events`.
+
+    Concurrent misses of the same key share a single query (single-flight).
+    The query runs in its own task, so cancelling the request which started
+    it affects neither the other requests nor the store. The task runs in an
+    empty context, and its DB time is added to each request waiting for it.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        # The queries running, dropped once stale so later reads don't join.
+        self._flights: dict[CacheKey, _Flight] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _make_key(
+        query: Callable[..., Awaitable[Any]], executor: Any, kwargs: dict[str, Any]
+    ) -> CacheKey:
+        return (
+            query.__module__,
+            isinstance(executor, JSONExecutor),
+            tuple(sorted(kwargs.items())),
+        )
+
+    async def fetch(
+        self,
+        query: Callable[..., Awaitable[Any]],
+        executor: edgedb.AsyncIOExecutor | JSONExecutor,
+        **kwargs: Hashable,
+    ) -> Any:
+        """Return the cached result of `query(executor, **kwargs)`, or run it."""
+        return (await self._fetch_entry(query, executor, kwargs)).value
+
+    async def fetch_with_etag(
+        self,
+        query: Callable[..., Awaitable[Any]],
+        executor: edgedb.AsyncIOExecutor | JSONExecutor,
+        **kwargs: Hashable,
+    ) -> tuple[Any, str]:
+        """Like `fetch`, together with the ETag of the result."""
+        entry = await self._fetch_entry(query, executor, kwargs)
+        if entry.etag is None:
+            entry.etag = make_etag(entry.value)
+        return entry.value, entry.etag
+
+    async def _fetch_entry(
+        self,
+        query: Callable[..., Awaitable[Any]],
+        executor: edgedb.AsyncIOExecutor | JSONExecutor,
+        kwargs: dict[str, Hashable],
+    ) -> _Entry:
+        key = self._make_key(query, executor, kwargs)
+        if (entry := self._entries.get(key)) is not None:
+            if entry.expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.query_cache_lookups_total.inc("hit")
+                return entry
+            del self._entries[key]
+            self.evictions += 1
+
+        if (flight := self._flights.get(key)) is not None:
+            self.coalesced += 1
+            metrics.query_cache_lookups_total.inc("coalesced")
+        else:
+            self.misses += 1
+            metrics.query_cache_lookups_total.inc("miss")
+            flight = self._start_flight(key, query, executor, kwargs)
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            metrics.report_db_time(
+                key[0].rpartition(".")[2].removesuffix("_async_edgeql"),
+                flight.db_time,
+            )
+
+    def _start_flight(
+        self,
+        key: CacheKey,
+        query: Callable[..., Awaitable[Any]],
+        executor: edgedb.AsyncIOExecutor | JSONExecutor,
+        kwargs: dict[str, Hashable],
+    ) -> _Flight:
+        flight = _Flight(metrics.RequestDBTime())
+        # Not the context of the request which happens to start the query.
+        context = contextvars.Context()
+        context.run(metrics.request_db_time.set, flight.db_time)
+        flight.task = asyncio.get_running_loop().create_task(
+            self._run_query(key, flight, query, executor, kwargs), context=context
+        )
+        flight.task.add_done_callback(lambda _: self._end_flight(key, flight))
+        self._flights[key] = flight
+        return flight
+
+    async def _run_query(
+        self,
+        key: CacheKey,
+        flight: _Flight,
+        query: Callable[..., Awaitable[Any]],
+        executor: edgedb.AsyncIOExecutor | JSONExecutor,
+        kwargs: dict[str, Hashable],
+    ) -> _Entry:
+        value = await query(executor, **kwargs)
+        # JSON text from the passthrough mode reads "null".
+        ttl = self.negative_ttl if value is None or value == "null" else self.ttl
+        entry = _Entry(self._clock() + ttl, value)
+        if not flight.stale:
+            self._store(key, entry)
+        return entry
+
+    def _end_flight(self, key: CacheKey, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Retrieved in case every request awaiting it was cancelled.
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def _drop_flight(self, key: CacheKey) -> None:
+        if (flight := self._flights.pop(key, None)) is not None:
+            flight.stale = True
+
+    def _store(self, key: CacheKey, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(
+        self, query: Callable[..., Awaitable[Any]], **kwargs: Hashable
+    ) -> None:
+        """
+        Drop the entries of `query(..., **kwargs)`, in both executor modes.
+        Without `kwargs`, all its entries are dropped.
+        """
+        if kwargs:
+            # The exact keys, rather than a scan of the whole cache per name.
+            arguments = tuple(sorted(kwargs.items()))
+            for json_mode in (False, True):
+                key = (query.__module__, json_mode, arguments)
+                self._entries.pop(key, None)
+                self._drop_flight(key)
+            return
+        for key in [key for key in self._entries if key[0] == query.__module__]:
+            del self._entries[key]
+        for key in [key for key in self._flights if key[0] == query.__module__]:
+            self._drop_flight(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for key in list(self._flights):
+            self._drop_flight(key)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+
+def invalidate_users(cache: QueryCache, names: Iterable[str] | None = None) -> None:
+    """Drop the user list and the users in `names`, or every user if `None`."""
+    cache.invalidate(get_users_qry.get_users)
+    if names is None:
+        cache.invalidate(get_user_by_name_qry.get_user_by_name)
+        return
+    for name in set(names):
+        cache.invalidate(get_user_by_name_qry.get_user_by_name, name=name)
+
+
+def invalidate_events(cache: QueryCache, names: Iterable[str] | None = None) -> None:
+    """Drop the event list and the events in `names`, or every event if `None`."""
+    cache.invalidate(get_events_qry.get_events)
+    if names is None:
+        cache.invalidate(get_event_by_name_qry.get_event_by_name)
+        return
+    for name in set(names):
+        cache.invalidate(get_event_by_name_qry.get_event_by_name, name=name)
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
-router = APIRouter(include_in_schema=False)
+from .timing import TimedRoute
+
+router = APIRouter(include_in_schema=False, route_class=TimedRoute)
 
 
 @router.get("/")
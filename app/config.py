@@ -3,7 +3,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 # from typing import Annotated
 # from pydantic import AfterValidator, HttpUrl
 # HttpUrlString = Annotated[HttpUrl, AfterValidator(str)]
-from .logging import CLogLevel
+from .logging import CLogLevel, LogOverflowPolicy
 
 
 # TODO: Decouple the messy and decide what variables should be include in the .env
@@ -23,6 +23,67 @@ class Settings(BaseSettings):
     backend_prefill: bool = False
     backend_log_json_format: bool = False
     backend_log_level: CLogLevel = CLogLevel.INFO
+    # 0 writes the logs synchronously, otherwise they are queued for a writer thread.
+    backend_log_queue_size: int = 0
+    backend_log_queue_overflow: LogOverflowPolicy = LogOverflowPolicy.DROP
+    backend_log_batch_size: int = 256
+    # Log 1 in N successful requests (0: none), errors and slow requests are always logged.
+    backend_access_log_sample_rate: int = 1
+    backend_access_log_slow_ms: float | None = None
+    # Seconds between the per-route summaries, 0 disables them.
+    backend_access_log_summary_interval: float = 0
+    backend_page_size: int = 50
+    backend_max_page_size: int = 500
+    backend_search_limit: int = 20
+    backend_max_lookup_keys: int = 100
+    backend_json_passthrough: bool = False
+    # EdgeDB client, the pool size defaults to the one suggested by the server.
+    backend_db_max_concurrency: int | None = None
+    # Seconds to connect, and to keep retrying while the server is unavailable.
+    backend_db_timeout: int = 10
+    backend_db_wait_until_available: int = 30
+    # Attempts for the queries and transactions failing with a transient error.
+    backend_db_retry_attempts: int = 3
+    # Have EdgeDB compile the queries of the handlers at startup.
+    backend_db_warm_up: bool = False
+    backend_bulk_chunk_size: int = 1000
+    # A JSON array is parsed whole, so larger bulk payloads must be NDJSON.
+    backend_bulk_array_max_bytes: int = 16 * 1024 * 1024
+    # Merge the concurrent single-user inserts arriving within the window, in
+    # seconds, into one statement of at most `max_size` users.
+    backend_group_commit: bool = False
+    backend_group_commit_window: float = 0.002
+    backend_group_commit_max_size: int = 100
+    backend_cache_max_size: int = 4096
+    backend_cache_ttl: float = 10.0
+    # Lookups which found nothing are only cached this long.
+    backend_cache_negative_ttl: float = 2.0
+    # Answer lookups of names known not to exist without querying EdgeDB. Only
+    # this instance's writes update the filters, so keep it off with several.
+    backend_name_filter: bool = False
+    backend_name_filter_capacity: int = 1_000_000
+    # Queries at least this slow are logged, none if unset.
+    backend_slow_query_ms: float | None = None
+    # Seconds each service has to answer a health check ping.
+    backend_health_timeout: float = 2.0
+    # Seconds a health check result is reused for.
+    backend_health_cache_ttl: float = 1.0
+    # Ping latency from which the app reports itself degraded, never if unset.
+    backend_health_degraded_ms: float | None = None
+    # Requests served at once, 0 disables the admission control.
+    backend_admission_max_in_flight: int = 100
+    # Requests waiting for a slot, and for how many seconds at most.
+    backend_admission_max_queue: int = 200
+    backend_admission_queue_timeout: float = 1.0
+    # Seconds sent in `Retry-After` with the 503 responses.
+    backend_admission_retry_after: int = 1
+    # Requests served at once per route budget, see `app.limits`. 0 is unlimited.
+    backend_route_concurrency: dict[str, int] = {
+        "users_list": 4,
+        "events_list": 4,
+        "bulk": 2,
+        "reset": 1,
+    }
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
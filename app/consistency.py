@@ -0,0 +1,70 @@
+"""
+Check the denormalized counters against the data they are derived from:
+
+    $ python -m app.consistency [--fix]
+
+The exit status is 1 if any drift was found and left unfixed.
+"""
+
+import argparse
+import asyncio
+import sys
+
+import edgedb
+
+from .config import settings
+from .logging import CLogLevel, ep_log, setup_logging
+from .queries import fix_user_n_events_drift_async_edgeql as fix_user_n_events_drift_qry
+from .queries import get_user_n_events_drift_async_edgeql as get_user_n_events_drift_qry
+
+
+async def check_user_n_events(
+    db_client: edgedb.AsyncIOExecutor, *, fix: bool = False
+) -> list[get_user_n_events_drift_qry.GetUserNEventsDriftResult]:
+    """
+    `User.n_events` is maintained by the triggers on `Event`. Recompute it from
+    the `Event.host` backlinks, report every user whose counter drifted and,
+    with `fix`, overwrite the drifted counters.
+    """
+    drifted_users = await get_user_n_events_drift_qry.get_user_n_events_drift(db_client)
+    for user in drifted_users:
+        ep_log(
+            "consistency",
+            f"User '{user.name}' has n_events={user.n_events}, "
+            f"expected {user.actual_n_events}.",
+            CLogLevel.WARNING,
+        )
+
+    if drifted_users and fix:
+        fixed_users = await fix_user_n_events_drift_qry.fix_user_n_events_drift(
+            db_client
+        )
+        ep_log(
+            "consistency",
+            f"Fixed n_events of {len(fixed_users)} users.",
+            CLogLevel.INFO,
+        )
+    return drifted_users
+
+
+async def main(fix: bool) -> int:
+    db_client = edgedb.create_async_client()
+    try:
+        drifted_users = await check_user_n_events(db_client, fix=fix)
+    finally:
+        await db_client.aclose()
+    return int(bool(drifted_users) and not fix)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--fix", action="store_true", help="overwrite the drifted counters"
+    )
+    args = parser.parse_args()
+
+    setup_logging(
+        json_logs=settings.backend_log_json_format,
+        log_level=settings.backend_log_level,
+    )
+    sys.exit(asyncio.run(main(args.fix)))
@@ -6,12 +6,16 @@ import svcs
 from edgedb.asyncio_client import AsyncIOClient
 from fastapi import APIRouter, Body
 
+from .cache import QueryCache
+from .existence import EventNameFilter, UserNameFilter
 from .factories import gen_default_dev_data
+from .limits import concurrency_limit
 from .models import DevDataCreate
 from .queries import create_event_async_edgeql as create_event_qry
 from .queries import set_default_dev_data_async_edgeql as set_default_dev_data_qry
+from .timing import TimedRoute
 
-router = APIRouter(include_in_schema=False)
+router = APIRouter(include_in_schema=False, route_class=TimedRoute)
 
 
 @router.post(
@@ -19,6 +23,7 @@ router = APIRouter(include_in_schema=False)
     status_code=HTTPStatus.OK,
     response_model=list[create_event_qry.CreateEventResult],
     tags=["reset"],
+    dependencies=[concurrency_limit("reset")],
 )
 async def reset_default_dev_data(
     services: svcs.fastapi.DepContainer,
@@ -29,7 +34,15 @@ async def reset_default_dev_data(
     `prepare_dev_data_qry.prepare_dev_data` will **DELETE ALL USERS AND EVENTS**!!!
     Well, after all, this is a setup for dev.
     """
-    client = await services.aget(AsyncIOClient)
-    return await set_default_dev_data_qry.set_default_dev_data(
-        client, data=json.dumps(gen_default_dev_data(dev_data.n))
+    client, cache, event_filter, user_filter = await services.aget(
+        AsyncIOClient, QueryCache, EventNameFilter, UserNameFilter
     )
+    data = gen_default_dev_data(dev_data.n)
+    for event in data:
+        event_filter.add(event["name"])
+        user_filter.add(event["host_name"])
+    created_events = await set_default_dev_data_qry.set_default_dev_data(
+        client, data=json.dumps(data)
+    )
+    cache.clear()
+    return created_events
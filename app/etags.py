@@ -0,0 +1,42 @@
+import hashlib
+import json
+from http import HTTPStatus
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .executors import RawJSONResponse
+
+
+def make_etag(content: Any) -> str:
+    """
+    A strong ETag from a hash of the content. JSON text from the passthrough
+    mode is hashed as is, anything else as its JSON-compatible encoding.
+    """
+    if not isinstance(content, str):
+        content = json.dumps(jsonable_encoder(content), separators=(",", ":"))
+    return f'"{hashlib.blake2b(content.encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # `If-None-Match` uses the weak comparison, so a `W/` prefix is ignored.
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def etag_response(request: Request, response: Response, content: Any, etag: str):
+    """
+    Answer with a `304 Not Modified` if the client already holds `etag`,
+    before anything is serialized. Otherwise, send `content` with its `ETag`,
+    where JSON text from the passthrough mode is sent as is.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+    if isinstance(content, str):
+        return RawJSONResponse(content, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return content
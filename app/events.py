@@ -1,20 +1,59 @@
+import datetime
+import json
+import uuid
 from http import HTTPStatus
 from typing import Annotated
 
 import edgedb
 import svcs
 from edgedb.asyncio_client import AsyncIOClient
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
+from .bulk import (
+    InvalidBulkPayloadError,
+    bulk_response,
+    insert_deduplicated,
+    process_in_chunks,
+    read_items,
+)
+from .cache import QueryCache, invalidate_events, invalidate_users
+from .config import settings
+from .etags import etag_response, make_etag
+from .executors import JSONExecutor
+from .existence import EventNameFilter, UserNameFilter
+from .limits import concurrency_limit, without_query_params
 from .logging import CLogLevel, async_ep_log
-from .models import EventCreate, EventUpdate
+from .lookup import InvalidLookupKeysError, match_lookup_keys, parse_lookup_keys
+from .models import (
+    BulkItemOut,
+    BulkItemStatus,
+    BulkOut,
+    EventCreate,
+    EventCreateBulk,
+    EventOrderBy,
+    EventsLookup,
+    EventsPage,
+    EventUpdate,
+)
+from .pagination import InvalidCursorError, aware_datetime, decode_cursor, make_page
+from .queries import bulk_create_events_async_edgeql as bulk_create_events_qry
+from .queries import bulk_upsert_event_hosts_async_edgeql as bulk_upsert_event_hosts_qry
 from .queries import create_event_async_edgeql as create_event_qry
 from .queries import delete_event_async_edgeql as delete_event_qry
 from .queries import get_event_by_name_async_edgeql as get_event_by_name_qry
 from .queries import get_events_async_edgeql as get_events_qry
+from .queries import get_events_by_keys_async_edgeql as get_events_by_keys_qry
+from .queries import (
+    get_events_page_by_created_at_async_edgeql as get_events_page_by_created_at_qry,
+)
+from .queries import get_events_page_by_name_async_edgeql as get_events_page_by_name_qry
+from .queries import (
+    get_events_page_by_schedule_async_edgeql as get_events_page_by_schedule_qry,
+)
 from .queries import update_event_async_edgeql as update_event_qry
+from .timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 ################################
@@ -22,22 +61,199 @@ router = APIRouter()
 ################################
 
 
+# order_by => (query, converters of the `after_*` arguments, cursor keys of a row)
+_events_page_queries = {
+    EventOrderBy.CREATED_AT: (
+        get_events_page_by_created_at_qry.get_events_page_by_created_at,
+        {"after_created_at": aware_datetime, "after_id": uuid.UUID},
+        lambda event: (event.created_at, event.id),
+    ),
+    EventOrderBy.NAME: (
+        get_events_page_by_name_qry.get_events_page_by_name,
+        {"after_name": str},
+        lambda event: (event.name,),
+    ),
+    EventOrderBy.SCHEDULE: (
+        get_events_page_by_schedule_qry.get_events_page_by_schedule,
+        {"after_schedule": aware_datetime, "after_id": uuid.UUID},
+        lambda event: (event.schedule, event.id),
+    ),
+}
+
+
+async def _get_events_page(
+    db_client: AsyncIOClient,
+    *,
+    limit: int,
+    after: str | None,
+    order_by: EventOrderBy,
+    host_name: str | None,
+    schedule_from: datetime.datetime | None,
+    schedule_to: datetime.datetime | None,
+) -> dict:
+    for schedule in (schedule_from, schedule_to):
+        if schedule is not None and schedule.tzinfo is None:
+            err_msg = """\
+                        Invalid datetime format. Datetime string must look like this: \n
+                        '2010-12-27T23:59:59-07:00'\
+                      """
+            await async_ep_log("api.events", err_msg, CLogLevel.WARNING)
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail={"error": err_msg},
+            )
+
+    query, after_converters, cursor_keys = _events_page_queries[order_by]
+    after_kwargs = dict.fromkeys(after_converters)
+    if after is not None:
+        try:
+            cursor_order_by, *after_keys = decode_cursor(
+                after, EventOrderBy, *after_converters.values()
+            )
+            if cursor_order_by != order_by:
+                raise InvalidCursorError(after)
+        except InvalidCursorError:
+            err_msg = f"Invalid cursor '{after}'."
+            await async_ep_log("api.events", err_msg, CLogLevel.WARNING)
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail={"error": err_msg},
+            )
+        after_kwargs = dict(zip(after_converters, after_keys))
+
+    events = await query(
+        db_client,
+        host_name=host_name,
+        schedule_from=schedule_from,
+        schedule_to=schedule_to,
+        **after_kwargs,
+        limit=limit + 1,
+    )
+    events, next_cursor = make_page(
+        events, limit, lambda event: (order_by.value, *cursor_keys(event))
+    )
+    return {"events": events, "next_cursor": next_cursor}
+
+
+async def _get_events_by_keys(
+    db_client: AsyncIOClient, *, names: str | None, ids: str | None
+) -> dict:
+    try:
+        names_, ids_ = parse_lookup_keys(names, ids)
+    except InvalidLookupKeysError as e:
+        err_msg = str(e)
+        await async_ep_log("api.events", err_msg, CLogLevel.WARNING)
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": err_msg},
+        )
+
+    events = await get_events_by_keys_qry.get_events_by_keys(
+        db_client, names=names_, ids=ids_
+    )
+    events, missing = match_lookup_keys(events, names_, ids_)
+    return {"events": events, "missing": missing}
+
+
+# Any of these selects less than the full list.
+_NOT_FULL_LIST_PARAMS = frozenset(
+    {
+        "name",
+        "names",
+        "ids",
+        "limit",
+        "after",
+        "order_by",
+        "host_name",
+        "schedule_from",
+        "schedule_to",
+    }
+)
+
+
 @router.get(
     "/events",
     response_model=list[get_events_qry.GetEventsResult]
-    | get_event_by_name_qry.GetEventByNameResult,
+    | get_event_by_name_qry.GetEventByNameResult
+    | EventsPage
+    | EventsLookup,
     tags=["events"],
+    dependencies=[
+        concurrency_limit(
+            "events_list", when=without_query_params(_NOT_FULL_LIST_PARAMS)
+        )
+    ],
 )
 async def get_events(
     services: svcs.fastapi.DepContainer,
+    request: Request,
+    response: Response,
     name: Annotated[str | None, Query(max_length=50)] = None,
+    names: str | None = None,
+    ids: str | None = None,
+    limit: Annotated[int | None, Query(ge=1, le=settings.backend_max_page_size)] = None,
+    after: Annotated[str | None, Query(max_length=200)] = None,
+    order_by: EventOrderBy | None = None,
+    host_name: Annotated[str | None, Query(max_length=50)] = None,
+    schedule_from: datetime.datetime | None = None,
+    schedule_to: datetime.datetime | None = None,
 ):
-    db_client = await services.aget(AsyncIOClient)
+    """
+    With `names` and/or `ids`, comma-separated, the matching events are fetched
+    in a single query and returned in the requested order. The keys which
+    matched nothing are listed in `missing`.
+
+    Without any of the paging (`limit`, `after`, `order_by`) or filtering
+    (`host_name`, `schedule_from`, `schedule_to`) parameters, all events are
+    returned as a list. Otherwise, a page is returned together with
+    `next_cursor`, which should be passed back as `after` (with the same
+    `order_by`) to fetch the next page. Events without a `schedule` are
+    ordered last, and are left out once `schedule_from` or `schedule_to` is set.
+
+    With `backend_json_passthrough` enabled, the full list and the single event
+    are sent as the JSON rendered by EdgeDB. Pages are always decoded, since
+    their size is already bounded by `limit`.
+
+    The full list and the single event are served from the `QueryCache`.
+    The full list, pages and the single event carry a strong `ETag`, and
+    a matching `If-None-Match` is answered with `304 Not Modified`.
+    """
+    db_client, cache = await services.aget(AsyncIOClient, QueryCache)
+    if names is not None or ids is not None:
+        return await _get_events_by_keys(db_client, names=names, ids=ids)
+    executor = (
+        JSONExecutor(db_client) if settings.backend_json_passthrough else db_client
+    )
     if name is None:
-        return await get_events_qry.get_events(db_client)
-    else:
-        if event := await get_event_by_name_qry.get_event_by_name(db_client, name=name):
-            return event
+        if all(
+            param is None
+            for param in (limit, after, order_by, host_name, schedule_from, schedule_to)
+        ):
+            events, etag = await cache.fetch_with_etag(
+                get_events_qry.get_events, executor
+            )
+            return etag_response(request, response, events, etag)
+        page = await _get_events_page(
+            db_client,
+            limit=limit or settings.backend_page_size,
+            after=after,
+            order_by=order_by or EventOrderBy.CREATED_AT,
+            host_name=host_name,
+            schedule_from=schedule_from,
+            schedule_to=schedule_to,
+        )
+        # Rendered once, and the ETag hashed from the very text sent.
+        body = EventsPage.model_validate(page, from_attributes=True).model_dump_json()
+        return etag_response(request, response, body, make_etag(body))
+
+    # A name the filter has never seen doesn't exist, no need to ask EdgeDB.
+    event_filter = await services.aget(EventNameFilter)
+    if event_filter.might_contain(name):
+        event, etag = await cache.fetch_with_etag(
+            get_event_by_name_qry.get_event_by_name, executor, name=name
+        )
+        if event and event != "null":
+            return etag_response(request, response, event, etag)
 
     err_msg = f"Event '{name}' does not exist."
     await async_ep_log("api.events", err_msg, CLogLevel.WARNING)
@@ -62,7 +278,12 @@ async def post_event(
     services: svcs.fastapi.DepContainer,
     event: EventCreate,
 ):
-    db_client = await services.aget(AsyncIOClient)
+    db_client, cache, event_filter, user_filter = await services.aget(
+        AsyncIOClient, QueryCache, EventNameFilter, UserNameFilter
+    )
+    # Added before the insert, so no lookup misses them once they exist.
+    event_filter.add(event.name)
+    user_filter.add(event.host_name)
     try:
         created_event = await create_event_qry.create_event(
             db_client, **event.model_dump()
@@ -85,9 +306,101 @@ async def post_event(
             detail={"error": err_msg},
         )
     else:
+        invalidate_events(cache, [event.name])
+        # The host may have been created, and its `n_events` has changed.
+        invalidate_users(cache, [created_event.host_name])
         return created_event
 
 
+async def _create_events_chunk(
+    db_client: AsyncIOClient,
+    cache: QueryCache,
+    event_filter: EventNameFilter,
+    user_filter: UserNameFilter,
+    chunk: list[tuple[int, EventCreateBulk]],
+) -> list[BulkItemOut]:
+    for _, event in chunk:
+        event_filter.add(event.name)
+        user_filter.add(event.host_name)
+
+    async def insert(firsts: list[tuple[int, EventCreateBulk]]):
+        payload = json.dumps([event.model_dump() for _, event in firsts])
+        # The hosts are upserted once per chunk, then the events are inserted
+        # against them. A retried transaction runs both statements again.
+        async for tx in db_client.transaction():
+            async with tx:
+                await bulk_upsert_event_hosts_qry.bulk_upsert_event_hosts(
+                    tx, events=payload
+                )
+                created_events = await bulk_create_events_qry.bulk_create_events(
+                    tx, events=payload
+                )
+        return created_events
+
+    results = await insert_deduplicated(chunk, lambda item: item[1].name, insert)
+    inserted = [event for (_, event), created in results if created is not None]
+    invalidate_events(cache, {event.name for event in inserted})
+    invalidate_users(cache, {event.host_name for event in inserted})
+
+    statuses = []
+    for (index, event), created in results:
+        if created is not None:
+            statuses.append(
+                BulkItemOut(index=index, name=event.name, status=BulkItemStatus.CREATED)
+            )
+        else:
+            statuses.append(
+                BulkItemOut(
+                    index=index,
+                    name=event.name,
+                    status=BulkItemStatus.DUPLICATE,
+                    error=f"Event name '{event.name}' already exists.",
+                )
+            )
+    return statuses
+
+
+@router.post(
+    "/events/bulk",
+    response_model=BulkOut,
+    tags=["events"],
+    dependencies=[concurrency_limit("bulk")],
+)
+async def post_events_bulk(services: svcs.fastapi.DepContainer, request: Request):
+    """
+    Create events from a JSON array, or from an NDJSON stream
+    (`Content-Type: application/x-ndjson`), of `EventCreate` records.
+    Every `backend_bulk_chunk_size` records are imported in one transaction,
+    which upserts the referenced hosts and then inserts the events, and every
+    row is reported as `created`, `duplicate` or `invalid` by its index in the
+    payload. Only the current chunk of an NDJSON stream is held in memory,
+    while a JSON array is read whole and refused with a 413 beyond
+    `backend_bulk_array_max_bytes`.
+    """
+    db_client, cache, event_filter, user_filter = await services.aget(
+        AsyncIOClient, QueryCache, EventNameFilter, UserNameFilter
+    )
+    try:
+        items = await read_items(request, settings.backend_bulk_array_max_bytes)
+    except InvalidBulkPayloadError as e:
+        err_msg = str(e)
+        await async_ep_log("api.events", err_msg, CLogLevel.WARNING)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={"error": err_msg},
+        )
+
+    results = process_in_chunks(
+        items,
+        EventCreateBulk,
+        lambda chunk: _create_events_chunk(
+            db_client, cache, event_filter, user_filter, chunk
+        ),
+        settings.backend_bulk_chunk_size,
+    )
+    return await bulk_response(request, results)
+
+
 # ################################
 # Update events
 # ################################
@@ -96,13 +409,20 @@ async def post_event(
 @router.put(
     "/events",
     response_model=update_event_qry.UpdateEventResult,
+    response_model_exclude={"orig_host_name"},
     tags=["events"],
 )
 async def put_event(
     services: svcs.fastapi.DepContainer,
     event: EventUpdate,
 ):
-    db_client = await services.aget(AsyncIOClient)
+    db_client, cache, event_filter, user_filter = await services.aget(
+        AsyncIOClient, QueryCache, EventNameFilter, UserNameFilter
+    )
+    if event.new_name is not None:
+        event_filter.add(event.new_name)
+    if event.host_name is not None:
+        user_filter.add(event.host_name)
     try:
         updated_event = await update_event_qry.update_event(
             db_client, **event.model_dump()
@@ -126,6 +446,12 @@ async def put_event(
         )
     else:
         if updated_event:
+            invalidate_events(cache, [event.name, updated_event.name])
+            # Both hosts' `n_events` changed.
+            if updated_event.orig_host_name != updated_event.host_name:
+                invalidate_users(
+                    cache, [updated_event.orig_host_name, updated_event.host_name]
+                )
             return updated_event
 
     err_msg = f"Update event '{event.name}' failed."
@@ -150,8 +476,10 @@ async def delete_event(
     services: svcs.fastapi.DepContainer,
     name: Annotated[str, Query(max_length=50)],
 ):
-    db_client = await services.aget(AsyncIOClient)
+    db_client, cache = await services.aget(AsyncIOClient, QueryCache)
     if deleted_event := await delete_event_qry.delete_event(db_client, name=name):
+        invalidate_events(cache, [name])
+        invalidate_users(cache, [deleted_event.host_name])
         return deleted_event
 
     err_msg = f"Delete event '{name}' failed."
@@ -0,0 +1,29 @@
+from typing import Any
+
+import edgedb
+from fastapi.responses import Response
+
+
+class JSONExecutor:
+    """
+    Wrap an executor so the generated `*_async_edgeql` query functions run
+    through `query_json`/`query_single_json`. The functions then return the
+    JSON text rendered by EdgeDB instead of building Python objects per row.
+    The shapes of the passthrough queries must select `id` explicitly,
+    since it's only implicitly included in the binary protocol.
+    """
+
+    def __init__(self, executor: edgedb.AsyncIOExecutor):
+        self._executor = executor
+
+    async def query(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._executor.query_json(query, *args, **kwargs)
+
+    async def query_single(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._executor.query_single_json(query, *args, **kwargs)
+
+
+class RawJSONResponse(Response):
+    """Send JSON text as is, skipping `jsonable_encoder` and `response_model`."""
+
+    media_type = "application/json"
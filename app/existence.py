@@ -0,0 +1,98 @@
+import hashlib
+import math
+from collections.abc import Iterable
+
+import edgedb
+
+from . import metrics
+from .queries import get_event_names_async_edgeql as get_event_names_qry
+from .queries import get_user_names_async_edgeql as get_user_names_qry
+
+
+class NameFilter:
+    """
+    A Bloom filter over names, answering whether a name may exist. A `False`
+    is definite, so a lookup can be answered with a 404 without querying
+    EdgeDB, while a `True` may be a false positive at `error_rate`.
+
+    Names can't be removed, so a deleted one is still a maybe. Until `build`
+    is called, or once more than `capacity` names were added, which would
+    raise the error rate, every name is a maybe.
+
+    Only the writes of this process are added, so with several backend
+    instances writing, the filter must stay disabled. A disabled filter
+    answers "maybe" and ignores the names added, without hashing them.
+    """
+
+    kind = ""
+
+    def __init__(
+        self, *, capacity: int, error_rate: float = 0.01, enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.n_bits = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self._bits = bytearray(math.ceil(self.n_bits / 8))
+        self.n_names = 0
+        self.ready = False
+
+    def _positions(self, name: str) -> Iterable[int]:
+        # Double hashing, the k positions are derived from two 64-bit hashes.
+        digest = hashlib.blake2b(name.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.n_bits for i in range(self.n_hashes))
+
+    def add(self, name: str) -> None:
+        if not self.enabled:
+            return
+        new = False
+        for position in self._positions(name):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                new = True
+        # A name added again sets no bit, so only distinct names are counted,
+        # give or take the false positives.
+        if new:
+            self.n_names += 1
+
+    def build(self, names: Iterable[str]) -> None:
+        """
+        Add `names` and start answering. The bits aren't reset, so the names
+        added while the names were being fetched aren't lost.
+        """
+        for name in names:
+            self.add(name)
+        self.ready = True
+
+    def might_contain(self, name: str) -> bool:
+        if not (self.enabled and self.ready) or self.n_names > self.capacity:
+            return True
+        result = all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(name)
+        )
+        metrics.name_filter_checks_total.inc(self.kind, "maybe" if result else "absent")
+        return result
+
+
+class UserNameFilter(NameFilter):
+    kind = "users"
+
+
+class EventNameFilter(NameFilter):
+    kind = "events"
+
+
+async def build_name_filters(
+    db_client: edgedb.AsyncIOClient,
+    user_filter: UserNameFilter,
+    event_filter: EventNameFilter,
+) -> None:
+    """Fill both filters from the names-only queries."""
+    user_filter.build(await get_user_names_qry.get_user_names(db_client, limit=None))
+    event_filter.build(await get_event_names_qry.get_event_names(db_client, limit=None))
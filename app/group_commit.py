@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+
+import edgedb
+
+from . import metrics
+from .bulk import insert_deduplicated
+from .queries import bulk_create_users_async_edgeql as bulk_create_users_qry
+from .queries import create_user_async_edgeql as create_user_qry
+
+
+class UserInsertBatcher:
+    """
+    Group commit for single-user inserts. The names arriving within `window`
+    seconds of the first one, or `max_size` of them, are inserted by a single
+    `bulk_create_users` statement, and each caller gets its own result back.
+
+    `create_user` is a drop-in for `create_user_qry.create_user`: a name which
+    already exists, or was sent earlier in the same batch, raises
+    `ConstraintViolationError` like the single insert does.
+
+    A batch is committed by a task with a context of its own, and the time of
+    its statement is added to each request of the batch. Once closed, the
+    inserts are run one by one.
+
+    Everything runs on the event loop, so the pending list needs no lock.
+    """
+
+    def __init__(self, *, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        # (name, future) of the inserts waiting for the next batch
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._closed = False
+        self._db_client: edgedb.AsyncIOExecutor | None = None
+        # The time of the statement of the next batch.
+        self._db_time = metrics.RequestDBTime()
+        self._timer: asyncio.TimerHandle | None = None
+        self._commits: set[asyncio.Task] = set()
+
+    async def create_user(
+        self, executor: edgedb.AsyncIOExecutor, *, name: str
+    ) -> create_user_qry.CreateUserResult:
+        if self._closed:
+            return await create_user_qry.create_user(executor, name=name)
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[create_user_qry.CreateUserResult] = loop.create_future()
+        self._pending.append((name, future))
+        db_time = self._db_time
+        if len(self._pending) == 1:
+            self._db_client = executor
+            self._timer = loop.call_later(self.window, self._flush)
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        try:
+            return await future
+        finally:
+            metrics.report_db_time("bulk_create_users", db_time)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        # Not the context of the request which happens to fill the batch.
+        context = contextvars.Context()
+        context.run(metrics.request_db_time.set, self._db_time)
+        self._db_time = metrics.RequestDBTime()
+        task = asyncio.get_running_loop().create_task(
+            self._commit(self._db_client, batch), context=context
+        )
+        self._commits.add(task)
+        task.add_done_callback(self._commits.discard)
+
+    async def _commit(
+        self,
+        executor: edgedb.AsyncIOExecutor,
+        batch: list[tuple[str, asyncio.Future]],
+    ) -> None:
+        async def insert(firsts: list[tuple[str, asyncio.Future]]):
+            metrics.user_insert_batch_size.observe(len(firsts))
+            return await bulk_create_users_qry.bulk_create_users(
+                executor, names=[name for name, _ in firsts]
+            )
+
+        try:
+            results = await insert_deduplicated(batch, lambda item: item[0], insert)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (name, future), user in results:
+            # The caller may have given up, the user is created all the same.
+            if future.done():
+                continue
+            if user is not None:
+                future.set_result(
+                    create_user_qry.CreateUserResult(
+                        id=user.id, name=user.name, created_at=user.created_at
+                    )
+                )
+            else:
+                future.set_exception(
+                    edgedb.errors.ConstraintViolationError(
+                        f"name violates exclusivity constraint: '{name}'"
+                    )
+                )
+
+    async def aclose(self) -> None:
+        """
+        Commit the pending inserts and wait for the running batches. The later
+        inserts don't wait for a batch anymore.
+        """
+        self._closed = True
+        self._flush()
+        if self._commits:
+            await asyncio.gather(*self._commits, return_exceptions=True)
@@ -1,27 +1,138 @@
+import asyncio
+import dataclasses
+import time
+from collections.abc import Awaitable, Callable
 from http import HTTPStatus
+from typing import Any
 
 import svcs
-from fastapi import APIRouter, HTTPException
+from edgedb.asyncio_client import AsyncIOClient
+from fastapi import APIRouter, HTTPException, Response
 
-from .models import HealthOut
+from . import metrics
+from .cache import QueryCache
+from .config import settings
+from .models import CacheStatsOut, HealthOut, HealthStatus, PoolOut
+from .timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+
+@dataclasses.dataclass
+class HealthResult:
+    ok: list[str]
+    failing: list[dict[str, str]]
+    # Ping round trips by service, failed ones included.
+    latency_ms: dict[str, float] = dataclasses.field(default_factory=dict)
+    pool: PoolOut | None = None
+
+    @property
+    def status(self) -> HealthStatus:
+        """Degraded once a ping took `backend_health_degraded_ms` or longer."""
+        threshold = settings.backend_health_degraded_ms
+        if threshold is not None and any(
+            latency_ms >= threshold for latency_ms in self.latency_ms.values()
+        ):
+            return HealthStatus.DEGRADED
+        return HealthStatus.OK
+
+    def to_out(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "status": self.status,
+            "latency_ms": self.latency_ms,
+            "pool": self.pool,
+        }
+
+
+class HealthCheckCache:
+    """
+    Keep the last health check result for `ttl` seconds, so frequent probes
+    don't each ping EdgeDB. Probes arriving during a check wait for it.
+    """
+
+    def __init__(self, *, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._result: HealthResult | None = None
+        self._expires_at = 0.0
+
+    def _get_fresh(self) -> HealthResult | None:
+        if self._result is not None and self._expires_at > self._clock():
+            return self._result
+        return None
+
+    async def get_or_check(
+        self, check: Callable[[], Awaitable[HealthResult]]
+    ) -> HealthResult:
+        if (result := self._get_fresh()) is not None:
+            return result
+        async with self._lock:
+            if (result := self._get_fresh()) is not None:
+                return result
+            self._result = await check()
+            self._expires_at = self._clock() + self.ttl
+            return self._result
+
+
+async def _ping(
+    svc: svcs.ServicePing, timeout: float, latency_ms: dict[str, float]
+) -> None:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(svc.aping(), timeout)
+    except asyncio.TimeoutError as e:
+        raise TimeoutError(f"No answer within {timeout}s") from e
+    finally:
+        latency_ms[svc.name] = round((time.perf_counter() - start) * 1000, 3)
+
+
+async def _pool_state(services: svcs.fastapi.DepContainer) -> PoolOut | None:
+    try:
+        db_client = await services.aget(AsyncIOClient)
+    except svcs.exceptions.ServiceNotFoundError:
+        return None
+    max_concurrency = db_client.max_concurrency or 0
+    return PoolOut(
+        max_concurrency=max_concurrency,
+        in_use=max_concurrency - db_client.free_size,
+        free=db_client.free_size,
+    )
 
 
 async def _check_healthy(
     services: svcs.fastapi.DepContainer,
-) -> tuple[list[str], list[dict[str, str]]]:
-    ok: list[str] = []
-    failing: list[dict[str, str]] = []
+) -> HealthResult:
+    """
+    Ping all services at once, each within `backend_health_timeout` seconds,
+    and read the state of the EdgeDB client pool.
+    """
+    health = HealthResult(ok=[], failing=[])
+
+    svcs_to_ping = services.get_pings()
+    results = await asyncio.gather(
+        *(
+            _ping(svc, settings.backend_health_timeout, health.latency_ms)
+            for svc in svcs_to_ping
+        ),
+        return_exceptions=True,
+    )
+    for svc, result in zip(svcs_to_ping, results):
+        if isinstance(result, Exception):
+            health.failing.append({svc.name: repr(result)})
+        else:
+            health.ok.append(svc.name)
+    health.pool = await _pool_state(services)
+
+    return health
 
-    for svc in services.get_pings():
-        try:
-            await svc.aping()
-            ok.append(svc.name)
-        except Exception as e:
-            failing.append({svc.name: repr(e)})
 
-    return ok, failing
+async def _cached_check_healthy(
+    services: svcs.fastapi.DepContainer,
+) -> HealthResult:
+    cache = await services.aget(HealthCheckCache)
+    return await cache.get_or_check(lambda: _check_healthy(services))
 
 
 @router.get(
@@ -33,13 +144,72 @@ async def _check_healthy(
 async def healthy(services: svcs.fastapi.DepContainer):
     """
     [Ping all external services.](https://svcs.hynek.me/en/stable/integrations/fastapi.html)
+
+    A slow but working service only turns the status into `degraded`.
     """
-    ok, failing = await _check_healthy(services)
+    health = await _cached_check_healthy(services)
 
-    if not failing:
-        return {"ok": ok}
+    if not health.failing:
+        return health.to_out()
 
     raise HTTPException(
         status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-        detail={"error": f"Health check failed: {failing}"},  # better rendering?
+        detail={"error": f"Health check failed: {health.failing}"},  # better rendering?
+    )
+
+
+@router.get(
+    "/livez",
+    response_model=HealthOut,
+    status_code=HTTPStatus.OK,
+    tags=["health"],
+)
+async def livez():
+    """Answer as long as the app serves requests, without touching any service."""
+    return {"ok": ["app"], "status": HealthStatus.OK}
+
+
+@router.get(
+    "/readyz",
+    response_model=HealthOut,
+    status_code=HTTPStatus.OK,
+    tags=["health"],
+)
+async def readyz(services: svcs.fastapi.DepContainer):
+    """
+    Like `/healthy`, but failing with a `503 Service Unavailable`, also when
+    degraded, so a load balancer drains a slow instance.
+    """
+    health = await _cached_check_healthy(services)
+
+    if health.failing:
+        error = f"Readiness check failed: {health.failing}"
+    elif health.status == HealthStatus.DEGRADED:
+        error = f"Degraded, ping latencies: {health.latency_ms}"
+    else:
+        return health.to_out()
+
+    raise HTTPException(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail={"error": error}
     )
+
+
+@router.get(
+    "/cache/stats",
+    response_model=CacheStatsOut,
+    tags=["health"],
+)
+async def cache_stats(services: svcs.fastapi.DepContainer):
+    """Counters of the read cache since the app started."""
+    cache = await services.aget(QueryCache)
+    return cache.stats()
+
+
+@router.get("/metrics", response_class=Response, tags=["health"])
+async def get_metrics(services: svcs.fastapi.DepContainer):
+    """The request, query and pool metrics in the Prometheus text format."""
+    db_client = await services.aget(AsyncIOClient)
+    max_concurrency = db_client.max_concurrency or 0
+    metrics.edgedb_pool_max_concurrency.set(max_concurrency)
+    metrics.edgedb_pool_in_use.set(max_concurrency - db_client.free_size)
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
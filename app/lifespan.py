@@ -1,3 +1,4 @@
+import dataclasses
 import json
 from functools import partial
 
@@ -7,21 +8,102 @@ from edgedb.asyncio_client import AsyncIOClient
 from fastapi import FastAPI
 from httpx import AsyncClient  # noqa: F401
 
+from .cache import QueryCache
 from .config import settings
+from .existence import EventNameFilter, UserNameFilter, build_name_filters
 from .factories import gen_default_dev_data
+from .group_commit import UserInsertBatcher
+from .health import HealthCheckCache
+from .limits import RouteLimiter
+from .logging import CLogLevel, async_ep_log, flush_logging
+from .metrics import InstrumentedExecutor
 from .queries import ping_db_async_edgeql as ping_db_qry
 from .queries import set_default_dev_data_async_edgeql as set_default_dev_data_qry
+from .warmup import warm_up_queries
+
+
+@dataclasses.dataclass(slots=True)
+class Services:
+    """The per-app singletons, see `register_services`."""
+
+    cache: QueryCache
+    user_filter: UserNameFilter
+    event_filter: EventNameFilter
+    batcher: UserInsertBatcher
+    route_limiter: RouteLimiter
+    health_check_cache: HealthCheckCache
+
+
+def register_services(registry: svcs.Registry) -> Services:
+    """
+    Create the per-app singletons from the settings and register them. The
+    tests register theirs the same way, only against mocked clients.
+    """
+    services = Services(
+        # Read cache
+        cache=QueryCache(
+            max_size=settings.backend_cache_max_size,
+            ttl=settings.backend_cache_ttl,
+            negative_ttl=settings.backend_cache_negative_ttl,
+        ),
+        # Name existence filters, which answer "maybe" for every name until
+        # built, and always if disabled.
+        user_filter=UserNameFilter(
+            capacity=settings.backend_name_filter_capacity,
+            enabled=settings.backend_name_filter,
+        ),
+        event_filter=EventNameFilter(
+            capacity=settings.backend_name_filter_capacity,
+            enabled=settings.backend_name_filter,
+        ),
+        # Group commit of the single-user inserts, used if enabled
+        batcher=UserInsertBatcher(
+            window=settings.backend_group_commit_window,
+            max_size=settings.backend_group_commit_max_size,
+        ),
+        # Per-route concurrency budgets
+        route_limiter=RouteLimiter(settings.backend_route_concurrency),
+        # Health check results
+        health_check_cache=HealthCheckCache(ttl=settings.backend_health_cache_ttl),
+    )
+    registry.register_value(QueryCache, services.cache)
+    registry.register_value(UserNameFilter, services.user_filter)
+    registry.register_value(EventNameFilter, services.event_filter)
+    registry.register_value(
+        UserInsertBatcher, services.batcher, on_registry_close=services.batcher.aclose
+    )
+    registry.register_value(RouteLimiter, services.route_limiter)
+    registry.register_value(HealthCheckCache, services.health_check_cache)
+    return services
+
+
+async def ping_db_callable(_db_client):
+    await ping_db_qry.ping_db(_db_client)
 
 
 async def _lifespan(app: FastAPI, registry: svcs.Registry, *, prefill: bool):
     # EdgeDB client
-    db_client = edgedb.create_async_client()
+    db_client = edgedb.create_async_client(
+        max_concurrency=settings.backend_db_max_concurrency,
+        timeout=settings.backend_db_timeout,
+        wait_until_available=settings.backend_db_wait_until_available,
+    ).with_retry_options(
+        edgedb.RetryOptions(attempts=settings.backend_db_retry_attempts)
+    )
+    # Connect now rather than on the first request.
+    await db_client.ensure_connected()
+    if settings.backend_db_warm_up:
+        n_queries = await warm_up_queries(
+            db_client, json_passthrough=settings.backend_json_passthrough
+        )
+        await async_ep_log("api.db", f"Warmed up {n_queries} queries", CLogLevel.INFO)
+    # The handlers get the client timed per query, see `app.metrics`.
+    instrumented_db_client = InstrumentedExecutor(
+        db_client, slow_ms=settings.backend_slow_query_ms
+    )
 
     async def create_db_client():
-        yield db_client
-
-    async def ping_db_callable(_db_client):
-        return ping_db_qry
+        yield instrumented_db_client
 
     registry.register_factory(
         AsyncIOClient,
@@ -29,6 +111,10 @@ async def _lifespan(app: FastAPI, registry: svcs.Registry, *, prefill: bool):
         ping=ping_db_callable,
     )
 
+    services = register_services(registry)
+    if settings.backend_name_filter:
+        await build_name_filters(db_client, services.user_filter, services.event_filter)
+
     if prefill:
         # Web client
         #     http_client = AsyncClient(
@@ -51,6 +137,9 @@ async def _lifespan(app: FastAPI, registry: svcs.Registry, *, prefill: bool):
 
     yield
     await registry.aclose()
+    await db_client.aclose()
+    # The queued log records, including the shutdown ones, are written out.
+    flush_logging()
 
 
 def make_lifespan(*, prefill: bool):
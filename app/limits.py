@@ -0,0 +1,76 @@
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from typing import Any
+
+import svcs
+from fastapi import Depends, Request
+
+from . import metrics, timing
+
+
+class RouteLimiter:
+    """
+    A semaphore per named budget, so the expensive routes sharing a budget
+    wait for each other instead of holding every EdgeDB connection. A budget
+    missing from `budgets`, or set to 0, is unlimited.
+    """
+
+    def __init__(self, budgets: dict[str, int]):
+        self.budgets = budgets
+        self._semaphores = {
+            name: asyncio.Semaphore(size) for name, size in budgets.items() if size > 0
+        }
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, budget: str) -> AsyncIterator[None]:
+        if (semaphore := self._semaphores.get(budget)) is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        metrics.route_limit_waiting.inc(budget)
+        try:
+            await semaphore.acquire()
+        finally:
+            metrics.route_limit_waiting.dec(budget)
+        wait = time.perf_counter() - start
+        metrics.route_limit_wait_seconds.observe(wait, budget)
+        timing.record(f"wait-{budget}", wait)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+def without_query_params(params: Iterable[str]) -> Callable[[Request], bool]:
+    """A `when` predicate for the requests passing none of `params`."""
+    params = frozenset(params)
+
+    def when(request: Request) -> bool:
+        return not request.query_params.keys() & params
+
+    return when
+
+
+def concurrency_limit(
+    budget: str, *, when: Callable[[Request], bool] | None = None
+) -> Any:
+    """
+    A route dependency holding a slot of `budget` while the endpoint runs,
+    or only for the requests `when` returns `True` for.
+    """
+
+    async def limit(
+        services: svcs.fastapi.DepContainer, request: Request
+    ) -> AsyncIterator[None]:
+        if when is not None and not when(request):
+            yield
+            return
+        limiter = await services.aget(RouteLimiter)
+        async with limiter.acquire(budget):
+            yield
+
+    # Released once the endpoint returns, not once the response is sent.
+    return Depends(limit, scope="function")
@@ -0,0 +1,56 @@
+import itertools
+import uuid
+from collections.abc import Sequence
+from typing import TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+
+class InvalidLookupKeysError(ValueError):
+    pass
+
+
+def split_keys(value: str | None) -> list[str]:
+    """Split a comma-separated query parameter, dropping blanks and repeats."""
+    if value is None:
+        return []
+    return list(dict.fromkeys(key for key in map(str.strip, value.split(",")) if key))
+
+
+def parse_lookup_keys(
+    names: str | None, ids: str | None
+) -> tuple[list[str], list[uuid.UUID]]:
+    names_, ids_ = split_keys(names), split_keys(ids)
+    if len(names_) + len(ids_) > settings.backend_max_lookup_keys:
+        raise InvalidLookupKeysError(
+            f"At most {settings.backend_max_lookup_keys} names and ids can be looked up at once."
+        )
+    try:
+        return names_, [uuid.UUID(id_) for id_ in ids_]
+    except ValueError as e:
+        raise InvalidLookupKeysError(f"Invalid ids '{ids}'.") from e
+
+
+def match_lookup_keys(
+    rows: Sequence[T], names: list[str], ids: list[uuid.UUID]
+) -> tuple[list[T], list[str]]:
+    """
+    Order `rows` as their keys were requested, and report the keys which
+    matched no row. A row matched by both its name and its id is returned once.
+    """
+    by_name: dict[str, T] = {row.name: row for row in rows}
+    by_id: dict[uuid.UUID, T] = {row.id: row for row in rows}
+
+    found: dict[uuid.UUID, T] = {}
+    missing: list[str] = []
+    for key, row in itertools.chain(
+        ((name, by_name.get(name)) for name in names),
+        ((str(id_), by_id.get(id_)) for id_ in ids),
+    ):
+        if row is None:
+            missing.append(key)
+        else:
+            found.setdefault(row.id, row)
+    return list(found.values()), missing
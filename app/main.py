@@ -8,20 +8,41 @@ from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app import common, dev_reset, events, health, users  # noqa: F401
+from app.admission import AdmissionMiddleware
 from app.config import settings
 from app.lifespan import lifespan
 from app.logging import setup_logging
-from app.middlewares import add_logging_middleware  # noqa: F401
+from app.middlewares import (
+    LoggingMiddleware,
+    add_logging_middleware,  # noqa: F401
+)
 
 setup_logging(
-    json_logs=settings.backend_log_json_format, log_level=settings.backend_log_level
+    json_logs=settings.backend_log_json_format,
+    log_level=settings.backend_log_level,
+    queue_size=settings.backend_log_queue_size,
+    overflow=settings.backend_log_queue_overflow,
+    batch_size=settings.backend_log_batch_size,
 )
 
 
 def make_app(lifespan):
     app = FastAPI(lifespan=lifespan)
 
-    app.middleware("http")(add_logging_middleware)
+    # Inside the logging middleware, so shed requests are logged and counted.
+    app.add_middleware(
+        AdmissionMiddleware,
+        max_in_flight=settings.backend_admission_max_in_flight,
+        max_queue=settings.backend_admission_max_queue,
+        queue_timeout=settings.backend_admission_queue_timeout,
+        retry_after=settings.backend_admission_retry_after,
+    )
+    app.add_middleware(
+        LoggingMiddleware,
+        sample_rate=settings.backend_access_log_sample_rate,
+        slow_ms=settings.backend_access_log_slow_ms,
+        summary_interval=settings.backend_access_log_summary_interval,
+    )
     app.add_middleware(
         CORSMiddleware,
         # allow_origins=[
@@ -0,0 +1,428 @@
+"""
+A minimal metrics registry rendered in the Prometheus text format.
+
+Everything is recorded from the event loop thread, so the metrics are plain
+dicts and lists without locks. An observation costs a dict lookup, a bisect
+and a few additions.
+"""
+
+import abc
+import bisect
+import contextvars
+import dataclasses
+import functools
+import inspect
+import math
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from typing import Any
+
+import structlog
+
+from . import timing
+from .warmup import iter_query_modules
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# In seconds, covering both the DB queries and the requests.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], labels: tuple[Any, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)
+    )
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterable[str]: ...
+
+    def render(self) -> str:
+        return "".join(
+            [
+                f"# HELP {self.name} {self.documentation}\n",
+                f"# TYPE {self.name} {self.kind}\n",
+                *self._samples(),
+            ]
+        )
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: defaultdict[tuple[Any, ...], float] = defaultdict(float)
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        self._values[labels] += amount
+
+    def get(self, *labels: Any) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}\n"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: defaultdict[tuple[Any, ...], float] = defaultdict(float)
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        self._values[labels] += amount
+
+    def dec(self, *labels: Any, amount: float = 1) -> None:
+        self._values[labels] -= amount
+
+    def set(self, value: float, *labels: Any) -> None:
+        self._values[labels] = value
+
+    def get(self, *labels: Any) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}\n"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels => [count per bucket, ..., count above the last bucket, sum]
+        self._values: dict[tuple[Any, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        if (counts := self._values.get(labels)) is None:
+            counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, *labels: Any) -> int:
+        counts = self._values.get(labels)
+        return int(sum(counts[:-1])) if counts else 0
+
+    def _samples(self) -> Iterable[str]:
+        for labels, counts in self._values.items():
+            cumulative = 0
+            for le, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    (*self.labelnames, "le"), (*labels, _format_value(le))
+                )
+                yield f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}\n"
+            formatted_labels = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{formatted_labels} {_format_value(counts[-1])}\n"
+            yield f"{self.name}_count{formatted_labels} {_format_value(cumulative)}\n"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests by route template and status.",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration_seconds = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template and status.",
+        ("method", "route", "status"),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests being served.")
+)
+db_query_duration_seconds = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "EdgeDB query latency by query module.",
+        ("query",),
+    )
+)
+db_query_rows_total = registry.register(
+    Counter(
+        "db_query_rows_total",
+        "Rows returned by the EdgeDB queries, by query module.",
+        ("query",),
+    )
+)
+db_query_errors_total = registry.register(
+    Counter(
+        "db_query_errors_total",
+        "EdgeDB queries which raised, by query module.",
+        ("query",),
+    )
+)
+# Set when the metrics are scraped.
+edgedb_pool_max_concurrency = registry.register(
+    Gauge("edgedb_pool_max_concurrency", "Size of the EdgeDB client pool.")
+)
+edgedb_pool_in_use = registry.register(
+    Gauge("edgedb_pool_in_use", "EdgeDB connections in use.")
+)
+admission_in_flight = registry.register(
+    Gauge("admission_in_flight", "Requests admitted by the admission control.")
+)
+admission_queue_depth = registry.register(
+    Gauge("admission_queue_depth", "Requests waiting to be admitted.")
+)
+admission_queue_wait_seconds = registry.register(
+    Histogram(
+        "admission_queue_wait_seconds",
+        "Time the admitted requests waited, by request class.",
+        ("class",),
+    )
+)
+admission_shed_total = registry.register(
+    Counter(
+        "admission_shed_total",
+        "Requests answered with a 503 by the admission control, by request class"
+        " and reason.",
+        ("class", "reason"),
+    )
+)
+query_cache_lookups_total = registry.register(
+    Counter(
+        "query_cache_lookups_total",
+        "Reads through the query cache, by result: a hit, a miss running the"
+        " query, or a miss coalesced into an identical running query.",
+        ("result",),
+    )
+)
+name_filter_checks_total = registry.register(
+    Counter(
+        "name_filter_checks_total",
+        "Name existence checks, by kind and result: absent or maybe.",
+        ("kind", "result"),
+    )
+)
+route_limit_waiting = registry.register(
+    Gauge(
+        "route_limit_waiting",
+        "Requests waiting for a slot of a route concurrency budget.",
+        ("budget",),
+    )
+)
+user_insert_batch_size = registry.register(
+    Histogram(
+        "user_insert_batch_size",
+        "Users inserted per group commit statement.",
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+    )
+)
+route_limit_wait_seconds = registry.register(
+    Histogram(
+        "route_limit_wait_seconds",
+        "Time waited for a slot of a route concurrency budget.",
+        ("budget",),
+    )
+)
+
+
+def route_label(scope: dict[str, Any]) -> str:
+    """The route template, so `/users/{id}`-like paths don't explode the labels."""
+    route = scope.get("route")
+    return getattr(route, "path", "<unmatched>")
+
+
+@functools.cache
+def _query_labels() -> dict[str, str]:
+    """
+    The text of every generated query => the name of its `*_async_edgeql`
+    module. The functions pass their query as a constant, which is read from
+    their code object.
+    """
+    labels = {}
+    for module in iter_query_modules():
+        label = module.__name__.rpartition(".")[2].removesuffix("_async_edgeql")
+        for _, func in inspect.getmembers(module, inspect.iscoroutinefunction):
+            if func.__module__ != module.__name__:
+                continue
+            for const in func.__code__.co_consts:
+                if isinstance(const, str):
+                    labels[const] = label
+    return labels
+
+
+def query_label(query: str) -> str:
+    """The name of the generated query module `query` comes from."""
+    return _query_labels().get(query, "<inline>")
+
+
+@dataclasses.dataclass(slots=True)
+class RequestDBTime:
+    """The time spent in EdgeDB queries while serving a request."""
+
+    n_queries: int = 0
+    duration: float = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 3)
+
+
+# Set by the logging middleware per request. It holds a mutable object, so the
+# queries run in tasks spawned by a handler are accounted for too.
+request_db_time: contextvars.ContextVar[RequestDBTime | None] = contextvars.ContextVar(
+    "request_db_time", default=None
+)
+
+
+def report_db_time(label: str, shared: RequestDBTime) -> None:
+    """
+    Add the time of the queries run for the current request by another task,
+    in its own context, e.g. a query shared by several requests.
+    """
+    if not shared.n_queries:
+        return
+    timing.record(f"db-{label}", shared.duration)
+    if (db_time := request_db_time.get()) is not None:
+        db_time.n_queries += shared.n_queries
+        db_time.duration += shared.duration
+
+
+def _count_rows(result: Any) -> int | None:
+    if isinstance(result, str):  # JSON text, not worth parsing
+        return None
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+class InstrumentedExecutor:
+    """
+    Wrap an EdgeDB client, or a transaction, so every query run through it is
+    timed and its rows counted per query module. The time is also added to
+    the current request, see `request_db_time`, and a query taking at least
+    `slow_ms` is logged. Everything else is delegated as is.
+    """
+
+    def __init__(self, executor: Any, *, slow_ms: float | None = None):
+        self._executor = executor
+        self.slow_ms = slow_ms
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._executor, name)
+
+    async def __aenter__(self) -> "InstrumentedExecutor":
+        await self._executor.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> bool | None:
+        return await self._executor.__aexit__(*exc_info)
+
+    async def transaction(self) -> AsyncIterator["InstrumentedExecutor"]:
+        async for tx in self._executor.transaction():
+            yield InstrumentedExecutor(tx, slow_ms=self.slow_ms)
+
+    async def _run(self, method: str, query: str, *args: Any, **kwargs: Any) -> Any:
+        label = query_label(query)
+        start = time.perf_counter()
+        rows = None
+        try:
+            result = await getattr(self._executor, method)(query, *args, **kwargs)
+            rows = _count_rows(result)
+            return result
+        except Exception:
+            db_query_errors_total.inc(label)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            db_query_duration_seconds.observe(duration, label)
+            timing.record(f"db-{label}", duration)
+            if rows is not None:
+                db_query_rows_total.inc(label, amount=rows)
+            if (db_time := request_db_time.get()) is not None:
+                db_time.n_queries += 1
+                db_time.duration += duration
+            if self.slow_ms is not None and duration * 1000 >= self.slow_ms:
+                structlog.stdlib.get_logger("api.db").warning(
+                    f"Slow query {label}",
+                    query=label,
+                    duration_ms=round(duration * 1000, 3),
+                    rows=rows,
+                )
+
+    async def query(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("query", query, *args, **kwargs)
+
+    async def query_single(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("query_single", query, *args, **kwargs)
+
+    async def query_required_single(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("query_required_single", query, *args, **kwargs)
+
+    async def query_json(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._run("query_json", query, *args, **kwargs)
+
+    async def query_single_json(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._run("query_single_json", query, *args, **kwargs)
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> None:
+        return await self._run("execute", query, *args, **kwargs)
@@ -1,10 +1,20 @@
+import bisect
+import dataclasses
+import math
 import time
+from collections import defaultdict
+from collections.abc import Callable
 
 import structlog
 from asgi_correlation_id.context import correlation_id
 from fastapi import Request, Response
+from starlette.datastructures import URL, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from uvicorn.protocols.utils import get_path_with_query_string
 
+from . import metrics
+from .timing import ServerTiming, server_timing
+
 
 async def add_logging_middleware(request: Request, call_next) -> Response:
     api_access_logger = structlog.stdlib.get_logger("backend.access")
@@ -44,3 +54,202 @@ async def add_logging_middleware(request: Request, call_next) -> Response:
         )
         response.headers["X-Process-Time"] = str(process_time / 10**9)
         return response
+
+
+# Upper bounds of the latency buckets the summary percentiles are estimated
+# from, in ms, each 25% wider than the previous one: 0.1ms up to about 80s.
+SUMMARY_BUCKETS_MS = tuple(0.1 * 1.25**i for i in range(62))
+
+
+@dataclasses.dataclass(slots=True)
+class _RouteSummary:
+    # Requests per bucket, the last one counting those above every bound.
+    counts: list[int] = dataclasses.field(
+        default_factory=lambda: [0] * (len(SUMMARY_BUCKETS_MS) + 1)
+    )
+    count: int = 0
+    errors: int = 0
+    min_ms: float = math.inf
+    max_ms: float = 0.0
+
+    def percentile(self, q: float) -> float:
+        """Interpolate within the bucket holding the `q` quantile."""
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                lower = SUMMARY_BUCKETS_MS[i - 1] if i else 0.0
+                upper = (
+                    SUMMARY_BUCKETS_MS[i]
+                    if i < len(SUMMARY_BUCKETS_MS)
+                    else self.max_ms
+                )
+                value = lower + (upper - lower) * (rank - cumulative) / n
+                return min(max(value, self.min_ms), self.max_ms)
+            cumulative += n
+        return self.max_ms
+
+
+class AccessLogSummary:
+    """
+    Per-route request counts and latency percentiles, which are handed out
+    and reset once `interval` seconds have passed.
+
+    The latencies are counted in the fixed `SUMMARY_BUCKETS_MS`, so the
+    memory per route stays the same whatever the load, and the percentiles
+    are estimates within a bucket's width.
+    """
+
+    def __init__(self, interval: float, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self._since = clock()
+        self._routes: defaultdict[str, _RouteSummary] = defaultdict(_RouteSummary)
+
+    def add(self, route: str, status_code: int, duration_ms: float) -> None:
+        summary = self._routes[route]
+        summary.counts[bisect.bisect_left(SUMMARY_BUCKETS_MS, duration_ms)] += 1
+        summary.count += 1
+        summary.min_ms = min(summary.min_ms, duration_ms)
+        summary.max_ms = max(summary.max_ms, duration_ms)
+        if status_code >= 400:
+            summary.errors += 1
+
+    def pop_due(self) -> dict[str, dict[str, float]]:
+        now = self._clock()
+        if now - self._since < self.interval:
+            return {}
+
+        summaries = {
+            route: {
+                "count": summary.count,
+                "errors": summary.errors,
+                "p50_ms": round(summary.percentile(0.5), 3),
+                "p90_ms": round(summary.percentile(0.9), 3),
+                "p99_ms": round(summary.percentile(0.99), 3),
+                "max_ms": round(summary.max_ms, 3),
+            }
+            for route, summary in self._routes.items()
+        }
+        self._since = now
+        self._routes.clear()
+        return summaries
+
+
+class LoggingMiddleware:
+    """
+    A pure ASGI take on `add_logging_middleware`. It wraps `send` instead of
+    going through `BaseHTTPMiddleware`, so it adds no task or memory stream
+    per request and leaves streaming responses alone.
+
+    `X-Process-Time` holds the time until the response started, and
+    `Server-Timing` breaks it down into phases, see `ServerTiming`. The access
+    log is written once the response is complete.
+
+    Only 1 in `sample_rate` successful responses is logged (none with 0), but
+    errors and requests slower than `slow_ms` always are. With
+    `summary_interval`, a per-route summary is logged at that interval.
+
+    Every request is also recorded in `app.metrics`, whatever the sampling,
+    and the access log splits the time spent in EdgeDB queries as `db_ms`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: int = 1,
+        slow_ms: float | None = None,
+        summary_interval: float = 0,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.summary = AccessLogSummary(summary_interval) if summary_interval else None
+        self._n_successful = 0
+
+    def _should_log(self, status_code: int, duration_ms: float) -> bool:
+        if status_code >= 400:
+            return True
+        if self.slow_ms is not None and duration_ms >= self.slow_ms:
+            return True
+        if self.sample_rate <= 0:
+            return False
+        self._n_successful += 1
+        return self._n_successful % self.sample_rate == 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        api_access_logger = structlog.stdlib.get_logger("backend.access")
+        structlog.contextvars.clear_contextvars()
+        request_id = correlation_id.get()
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+        start_time = time.perf_counter_ns()
+        status_code = 500
+        timing = ServerTiming()
+        timing_token = server_timing.set(timing)
+        metrics.http_requests_in_flight.inc()
+        db_time = metrics.RequestDBTime()
+        db_time_token = metrics.request_db_time.set(db_time)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = int(message["status"])
+                process_time = time.perf_counter_ns() - start_time
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = str(process_time / 10**9)
+                headers["Server-Timing"] = timing.header(process_time / 10**9)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            structlog.stdlib.get_logger("api.error").exception("Uncaught exception")
+            raise
+        finally:
+            process_time = time.perf_counter_ns() - start_time
+            duration_ms = process_time / 10**6
+            server_timing.reset(timing_token)
+            metrics.request_db_time.reset(db_time_token)
+            route = metrics.route_label(scope)
+            metrics.http_requests_in_flight.dec()
+            metrics.http_requests_total.inc(scope["method"], route, status_code)
+            metrics.http_request_duration_seconds.observe(
+                process_time / 10**9, scope["method"], route, status_code
+            )
+            if self.summary is not None:
+                self.summary.add(f"{scope['method']} {route}", status_code, duration_ms)
+                for route_name, route_summary in self.summary.pop_due().items():
+                    api_access_logger.info(
+                        f"Summary of {route_name}", route=route_name, **route_summary
+                    )
+
+            if self._should_log(status_code, duration_ms):
+                url = get_path_with_query_string(scope)
+
+                # scope["client"] is None for tests, so we need to fill in something here
+                client_host, client_port = scope.get("client") or (
+                    "testing_client_host",
+                    "testing_client_port",
+                )
+
+                http_method = scope["method"]
+                http_version = scope["http_version"]
+                api_access_logger.info(
+                    f"""{client_host}:{client_port} - "{http_method} {url} HTTP/{http_version}" {status_code}""",
+                    http={
+                        "url": str(URL(scope=scope)),
+                        "status_code": status_code,
+                        "method": http_method,
+                        "request_id": request_id,
+                        "version": http_version,
+                    },
+                    network={"client": {"ip": client_host, "port": client_port}},
+                    duration=process_time,
+                    db_ms=db_time.duration_ms,
+                    db_queries=db_time.n_queries,
+                )
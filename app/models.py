@@ -1,7 +1,8 @@
 import datetime
 import uuid
+from enum import Enum
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 ################################
@@ -71,6 +72,28 @@ class EventCreate(EventSchedule, EventAddress, EventHostName, EventName):
     pass
 
 
+class EventCreateBulk(EventCreate):
+    host_name: str = Field(
+        title="Hostname", description="max length: 50", max_length=50
+    )
+
+    @field_validator("schedule")
+    @classmethod
+    def check_schedule(cls, schedule: str | None) -> str | None:
+        # Checked upfront, so a bad row doesn't fail its whole chunk.
+        if schedule is not None:
+            try:
+                aware = datetime.datetime.fromisoformat(schedule).tzinfo is not None
+            except ValueError:
+                aware = False
+            if not aware:
+                raise ValueError(
+                    "Invalid datetime format. Datetime string must look like this: "
+                    "'2010-12-27T23:59:59-07:00'"
+                )
+        return schedule
+
+
 class EventNewName(BaseModel):
     new_name: str | None = Field(
         title="New Eventname", description="max length: 50", max_length=50
@@ -85,11 +108,93 @@ class EventFull(Auditable, EventCreate, EventID):
     pass
 
 
+class EventFullOut(Auditable, EventAddress, EventHostName, EventName, EventID):
+    schedule: datetime.datetime | None = Field(default=None)
+
+
+class EventOrderBy(str, Enum):
+    SCHEDULE = "schedule"
+    CREATED_AT = "created_at"
+    NAME = "name"
+
+
+################################
+# Pagination
+################################
+class UsersPage(BaseModel):
+    users: list[UserFull]
+    next_cursor: str | None = None
+
+
+class EventsPage(BaseModel):
+    events: list[EventFullOut]
+    next_cursor: str | None = None
+
+
+################################
+# Lookup
+################################
+class UsersLookup(BaseModel):
+    users: list[UserFull]
+    missing: list[str]
+
+
+class EventsLookup(BaseModel):
+    events: list[EventFullOut]
+    missing: list[str]
+
+
+################################
+# Bulk
+################################
+class BulkItemStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+
+
+class BulkItemOut(BaseModel):
+    index: int
+    name: str | None = None
+    status: BulkItemStatus
+    error: str | None = None
+
+
+class BulkOut(BaseModel):
+    created: int = 0
+    duplicate: int = 0
+    invalid: int = 0
+    items: list[BulkItemOut] = Field(default_factory=list)
+
+
 ################################
 # Health
 ################################
+class HealthStatus(str, Enum):
+    OK = "ok"
+    DEGRADED = "degraded"
+
+
+class PoolOut(BaseModel):
+    max_concurrency: int
+    in_use: int
+    free: int
+
+
 class HealthOut(BaseModel):
     ok: list[str] = Field(default_factory=list)
+    status: HealthStatus = HealthStatus.OK
+    latency_ms: dict[str, float] = Field(default_factory=dict)
+    pool: PoolOut | None = None
+
+
+class CacheStatsOut(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
 
 
 ################################
@@ -0,0 +1,65 @@
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Callable, Sequence
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(*keys: Any) -> str:
+    """
+    Pack the sort keys of the last row of a page into an opaque, url-safe string.
+    `datetime` and `uuid` keys are stored by their string representation.
+    """
+    raw = json.dumps(
+        [key if key is None else str(key) for key in keys], separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def aware_datetime(value: str) -> datetime.datetime:
+    """
+    Cursor converter of the `datetime` keys, which are compared against
+    `datetime` properties in EdgeDB and so must carry a timezone.
+    """
+    dt = datetime.datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        raise ValueError(f"Datetime '{value}' has no timezone.")
+    return dt
+
+
+def decode_cursor(cursor: str, *converters: Callable[[str], Any]) -> tuple[Any, ...]:
+    """
+    Reverse `encode_cursor`. Each key is passed through its converter,
+    e.g. `decode_cursor(after, aware_datetime, uuid.UUID)`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        keys = json.loads(raw)
+        if not isinstance(keys, list) or len(keys) != len(converters):
+            raise InvalidCursorError(cursor)
+        return tuple(
+            key if key is None else converter(key)
+            for key, converter in zip(keys, converters)
+        )
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(cursor) from e
+
+
+def make_page(
+    rows: Sequence[T], limit: int, cursor_keys: Callable[[T], tuple[Any, ...]]
+) -> tuple[list[T], str | None]:
+    """
+    `rows` is expected to be fetched with `limit + 1`, so an extra row
+    tells us there is a next page without running a `count()`.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return list(rows), encode_cursor(*cursor_keys(rows[-1]))
+    return list(rows), None
@@ -0,0 +1,58 @@
+# AUTOGENERATED FROM 'app/queries/bulk_create_events.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import dataclasses
+import edgedb
+import uuid
+
+
+class NoPydanticValidation:
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        # Pydantic 2.x
+        from pydantic_core.core_schema import any_schema
+
+        return any_schema()
+
+    @classmethod
+    def __get_validators__(cls):
+        # Pydantic 1.x
+        from pydantic.dataclasses import dataclass as pydantic_dataclass
+
+        pydantic_dataclass(cls)
+        cls.__pydantic_model__.__get_validators__ = lambda: []
+        return []
+
+
+@dataclasses.dataclass
+class BulkCreateEventsResult(NoPydanticValidation):
+    id: uuid.UUID
+    name: str
+
+
+async def bulk_create_events(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    events: str,
+) -> list[BulkCreateEventsResult]:
+    return await executor.query(
+        """\
+        with events := json_array_unpack(<json>$events),
+        select (
+            for event in events union (
+                insert Event {
+                    name := <str>event['name'],
+                    address := <str>json_get(event, 'address'),
+                    schedule := <datetime>json_get(event, 'schedule'),
+                    host := assert_exists(
+                        (select User filter .name = <str>event['host_name'])
+                    ),
+                }
+                unless conflict on .name
+            )
+        ) {name};\
+        """,
+        events=events,
+    )
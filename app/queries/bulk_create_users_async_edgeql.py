@@ -0,0 +1,53 @@
+# AUTOGENERATED FROM 'app/queries/bulk_create_users.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import dataclasses
+import datetime
+import edgedb
+import uuid
+
+
+class NoPydanticValidation:
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        # Pydantic 2.x
+        from pydantic_core.core_schema import any_schema
+
+        return any_schema()
+
+    @classmethod
+    def __get_validators__(cls):
+        # Pydantic 1.x
+        from pydantic.dataclasses import dataclass as pydantic_dataclass
+
+        pydantic_dataclass(cls)
+        cls.__pydantic_model__.__get_validators__ = lambda: []
+        return []
+
+
+@dataclasses.dataclass
+class BulkCreateUsersResult(NoPydanticValidation):
+    id: uuid.UUID
+    name: str
+    created_at: datetime.datetime
+
+
+async def bulk_create_users(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    names: list[str],
+) -> list[BulkCreateUsersResult]:
+    return await executor.query(
+        """\
+        with names := array_unpack(<array<str>>$names),
+        select (
+            for name in names union (
+                insert User {name := name}
+                unless conflict on .name
+            )
+        ) {name, created_at};\
+        """,
+        names=names,
+    )
@@ -0,0 +1,58 @@
+# AUTOGENERATED FROM 'app/queries/bulk_upsert_event_hosts.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import dataclasses
+import edgedb
+import uuid
+
+
+class NoPydanticValidation:
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        # Pydantic 2.x
+        from pydantic_core.core_schema import any_schema
+
+        return any_schema()
+
+    @classmethod
+    def __get_validators__(cls):
+        # Pydantic 1.x
+        from pydantic.dataclasses import dataclass as pydantic_dataclass
+
+        pydantic_dataclass(cls)
+        cls.__pydantic_model__.__get_validators__ = lambda: []
+        return []
+
+
+@dataclasses.dataclass
+class BulkUpsertEventHostsResult(NoPydanticValidation):
+    id: uuid.UUID
+    name: str
+
+
+async def bulk_upsert_event_hosts(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    events: str,
+) -> list[BulkUpsertEventHostsResult]:
+    return await executor.query(
+        """\
+        with events := json_array_unpack(<json>$events),
+            host_names := distinct (
+                for event in events union (
+                    select <str>event['host_name']
+                    filter not exists (select Event filter .name = <str>event['name'])
+                )
+            ),
+        select (
+            for host_name in host_names union (
+                insert User {name := host_name}
+                unless conflict on .name
+                else (select User)
+            )
+        ) {name};\
+        """,
+        events=events,
+    )
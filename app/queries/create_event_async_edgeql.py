@@ -56,10 +56,9 @@ async def create_event(
                 address := address,
                 schedule := schedule,
                 host := (
-                    with u:= assert_single((select User filter .name = host_name)),
-                    select 
-                    if exists u then (u)
-                    else (insert User {name:= host_name})
+                    insert User {name := host_name}
+                    unless conflict on .name
+                    else (select User)
                 )
             }
         ) {name, address, schedule, host_name:=.host.name};\
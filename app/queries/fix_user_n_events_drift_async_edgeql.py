@@ -0,0 +1,46 @@
+# AUTOGENERATED FROM 'app/queries/fix_user_n_events_drift.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import dataclasses
+import edgedb
+import uuid
+
+
+class NoPydanticValidation:
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        # Pydantic 2.x
+        from pydantic_core.core_schema import any_schema
+
+        return any_schema()
+
+    @classmethod
+    def __get_validators__(cls):
+        # Pydantic 1.x
+        from pydantic.dataclasses import dataclass as pydantic_dataclass
+
+        pydantic_dataclass(cls)
+        cls.__pydantic_model__.__get_validators__ = lambda: []
+        return []
+
+
+@dataclasses.dataclass
+class FixUserNEventsDriftResult(NoPydanticValidation):
+    id: uuid.UUID
+    name: str
+    n_events: int
+
+
+async def fix_user_n_events_drift(
+    executor: edgedb.AsyncIOExecutor,
+) -> list[FixUserNEventsDriftResult]:
+    return await executor.query(
+        """\
+        select (
+            update User filter .n_events != count(.<host[is Event])
+            set {n_events := count(.<host[is Event])}
+        ) {name, n_events};\
+        """,
+    )
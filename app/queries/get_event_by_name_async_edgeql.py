@@ -45,6 +45,7 @@ async def get_event_by_name(
     return await executor.query_single(
         """\
         select Event {
+            id,
             name, 
             created_at,
             address,
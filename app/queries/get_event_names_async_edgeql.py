@@ -0,0 +1,21 @@
+# AUTOGENERATED FROM 'app/queries/get_event_names.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import edgedb
+
+
+async def get_event_names(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    limit: int | None,
+) -> list[str]:
+    return await executor.query(
+        """\
+        select Event.name
+        order by Event.name
+        limit <optional int64>$limit;\
+        """,
+        limit=limit,
+    )
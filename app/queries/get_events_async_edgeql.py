@@ -42,6 +42,6 @@ async def get_events(
 ) -> list[GetEventsResult]:
     return await executor.query(
         """\
-        select Event {name, created_at, address, schedule, host_name:=.host.name};\
+        select Event {id, name, created_at, address, schedule, host_name:=.host.name};\
         """,
     )
@@ -0,0 +1,74 @@
+# AUTOGENERATED FROM 'app/queries/get_events_page_by_created_at.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import dataclasses
+import datetime
+import edgedb
+import uuid
+
+
+class NoPydanticValidation:
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        # Pydantic 2.x
+        from pydantic_core.core_schema import any_schema
+
+        return any_schema()
+
+    @classmethod
+    def __get_validators__(cls):
+        # Pydantic 1.x
+        from pydantic.dataclasses import dataclass as pydantic_dataclass
+
+        pydantic_dataclass(cls)
+        cls.__pydantic_model__.__get_validators__ = lambda: []
+        return []
+
+
+@dataclasses.dataclass
+class GetEventsPageByCreatedAtResult(NoPydanticValidation):
+    id: uuid.UUID
+    name: str
+    created_at: datetime.datetime
+    address: str | None
+    schedule: datetime.datetime | None
+    host_name: str
+
+
+async def get_events_page_by_created_at(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    host_name: str | None,
+    schedule_from: datetime.datetime | None,
+    schedule_to: datetime.datetime | None,
+    after_created_at: datetime.datetime | None,
+    after_id: uuid.UUID | None,
+    limit: int,
+) -> list[GetEventsPageByCreatedAtResult]:
+    return await executor.query(
+        """\
+        with host_name := <optional str>$host_name,
+             schedule_from := <optional datetime>$schedule_from,
+             schedule_to := <optional datetime>$schedule_to,
+             after_created_at := <optional datetime>$after_created_at,
+             after_id := <optional uuid>$after_id,
+        select Event {name, created_at, address, schedule, host_name:=.host.name}
+        filter ((.host.name = host_name) ?? true)
+           and ((.schedule >= schedule_from) ?? (not exists schedule_from))
+           and ((.schedule <= schedule_to) ?? (not exists schedule_to))
+           and ((
+                .created_at > after_created_at
+                or (.created_at = after_created_at and .id > after_id)
+           ) ?? true)
+        order by .created_at then .id
+        limit <int64>$limit;\
+        """,
+        host_name=host_name,
+        schedule_from=schedule_from,
+        schedule_to=schedule_to,
+        after_created_at=after_created_at,
+        after_id=after_id,
+        limit=limit,
+    )
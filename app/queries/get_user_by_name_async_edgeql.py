@@ -42,9 +42,10 @@ async def get_user_by_name(
 ) -> GetUserByNameResult | None:
     return await executor.query_single(
         """\
-        select User {name,
+        select User {id,
+                    name,
                     created_at, 
-                    n_events:= count(.<host[is Event])
+                    n_events
                 } 
         filter User.name=<str>$name;\
         """,
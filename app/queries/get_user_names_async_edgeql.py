@@ -0,0 +1,21 @@
+# AUTOGENERATED FROM 'app/queries/get_user_names.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import edgedb
+
+
+async def get_user_names(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    limit: int | None,
+) -> list[str]:
+    return await executor.query(
+        """\
+        select User.name
+        order by User.name
+        limit <optional int64>$limit;\
+        """,
+        limit=limit,
+    )
@@ -40,9 +40,10 @@ async def get_users(
 ) -> list[GetUsersResult]:
     return await executor.query(
         """\
-        select User {name,
+        select User {id,
+                    name,
                     created_at, 
-                    n_events:= count(.<host[is Event])
+                    n_events
                 }\
         """,
     )
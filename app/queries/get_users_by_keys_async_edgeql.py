@@ -0,0 +1,53 @@
+# AUTOGENERATED FROM 'app/queries/get_users_by_keys.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import dataclasses
+import datetime
+import edgedb
+import uuid
+
+
+class NoPydanticValidation:
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        # Pydantic 2.x
+        from pydantic_core.core_schema import any_schema
+
+        return any_schema()
+
+    @classmethod
+    def __get_validators__(cls):
+        # Pydantic 1.x
+        from pydantic.dataclasses import dataclass as pydantic_dataclass
+
+        pydantic_dataclass(cls)
+        cls.__pydantic_model__.__get_validators__ = lambda: []
+        return []
+
+
+@dataclasses.dataclass
+class GetUsersByKeysResult(NoPydanticValidation):
+    id: uuid.UUID
+    name: str
+    created_at: datetime.datetime
+    n_events: int
+
+
+async def get_users_by_keys(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    names: list[str],
+    ids: list[uuid.UUID],
+) -> list[GetUsersByKeysResult]:
+    return await executor.query(
+        """\
+        select distinct (
+            (select User filter .name in array_unpack(<array<str>>$names))
+            union (select User filter .id in array_unpack(<array<uuid>>$ids))
+        ) {id, name, created_at, n_events};\
+        """,
+        names=names,
+        ids=ids,
+    )
@@ -0,0 +1,63 @@
+# AUTOGENERATED FROM 'app/queries/get_users_page.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import dataclasses
+import datetime
+import edgedb
+import uuid
+
+
+class NoPydanticValidation:
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        # Pydantic 2.x
+        from pydantic_core.core_schema import any_schema
+
+        return any_schema()
+
+    @classmethod
+    def __get_validators__(cls):
+        # Pydantic 1.x
+        from pydantic.dataclasses import dataclass as pydantic_dataclass
+
+        pydantic_dataclass(cls)
+        cls.__pydantic_model__.__get_validators__ = lambda: []
+        return []
+
+
+@dataclasses.dataclass
+class GetUsersPageResult(NoPydanticValidation):
+    id: uuid.UUID
+    name: str
+    created_at: datetime.datetime
+    n_events: int
+
+
+async def get_users_page(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    after_created_at: datetime.datetime | None,
+    after_id: uuid.UUID | None,
+    limit: int,
+) -> list[GetUsersPageResult]:
+    return await executor.query(
+        """\
+        with after_created_at := <optional datetime>$after_created_at,
+             after_id := <optional uuid>$after_id,
+        select User {name,
+                    created_at, 
+                    n_events
+                } 
+        filter (
+            .created_at > after_created_at
+            or (.created_at = after_created_at and .id > after_id)
+        ) ?? true
+        order by .created_at then .id
+        limit <int64>$limit;\
+        """,
+        after_created_at=after_created_at,
+        after_id=after_id,
+        limit=limit,
+    )
@@ -0,0 +1,29 @@
+# AUTOGENERATED FROM 'app/queries/search_users_by_name.edgeql' WITH:
+#     $ edgedb-py
+
+
+from __future__ import annotations
+import edgedb
+
+
+async def search_users_by_name(
+    executor: edgedb.AsyncIOExecutor,
+    *,
+    name: str,
+    limit: int,
+) -> list[str]:
+    return await executor.query(
+        """\
+        with name := <str>$name,
+        select User.name
+        filter User.name ilike "%" ++ name ++ "%"
+        order by
+            # Prefix matches first, then the closest matches.
+            (User.name ilike name ++ "%") desc
+            then ext::pg_trgm::word_similarity(name, User.name) desc
+            then User.name
+        limit <int64>$limit;\
+        """,
+        name=name,
+        limit=limit,
+    )
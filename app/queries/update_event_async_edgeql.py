@@ -34,6 +34,7 @@ class UpdateEventResult(NoPydanticValidation):
     address: str | None
     schedule: datetime.datetime | None
     host_name: str
+    orig_host_name: str
 
 
 async def update_event(
@@ -64,13 +65,19 @@ async def update_event(
                 address := address,
                 schedule := schedule,
                 host := (
-                    with u:= assert_single((select detached User filter .name = host_name)),
-                    select 
-                    if exists u then (u)
-                    else (insert User {name:= host_name})
+                    insert User {name := host_name}
+                    unless conflict on .name
+                    else (select User)
                 )
             }
-        ) {name, address, schedule, host_name:=.host.name};\
+        ) {
+            name,
+            address,
+            schedule,
+            host_name:=.host.name,
+            # Lets the caller tell whether the host changed.
+            orig_host_name:=orig_event_host_name,
+        };\
         """,
         name=name,
         new_name=new_name,
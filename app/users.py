@@ -1,23 +1,51 @@
+import uuid
 from http import HTTPStatus
 from typing import Annotated
 
 import edgedb
 import svcs
 from edgedb.asyncio_client import AsyncIOClient
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
+from .bulk import (
+    InvalidBulkPayloadError,
+    bulk_response,
+    insert_deduplicated,
+    process_in_chunks,
+    read_items,
+)
+from .cache import QueryCache, invalidate_events, invalidate_users
+from .config import settings
+from .etags import etag_response, make_etag
+from .executors import JSONExecutor, RawJSONResponse
+from .existence import UserNameFilter
+from .group_commit import UserInsertBatcher
+from .limits import concurrency_limit, without_query_params
 from .logging import CLogLevel, async_ep_log
-from .models import UserCreate, UserUpdate
+from .lookup import InvalidLookupKeysError, match_lookup_keys, parse_lookup_keys
+from .models import (
+    BulkItemOut,
+    BulkItemStatus,
+    BulkOut,
+    UserCreate,
+    UsersLookup,
+    UsersPage,
+    UserUpdate,
+)
+from .pagination import InvalidCursorError, aware_datetime, decode_cursor, make_page
+from .queries import bulk_create_users_async_edgeql as bulk_create_users_qry
 from .queries import create_user_async_edgeql as create_user_qry
 from .queries import delete_user_async_edgeql as delete_user_qry
 from .queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from .queries import get_user_names_async_edgeql as get_user_names_qry
 from .queries import get_users_async_edgeql as get_users_qry
-from .queries import (
-    search_users_by_name_ilike_async_edgeql as search_users_by_name_ilike_qry,
-)
+from .queries import get_users_by_keys_async_edgeql as get_users_by_keys_qry
+from .queries import get_users_page_async_edgeql as get_users_page_qry
+from .queries import search_users_by_name_async_edgeql as search_users_by_name_qry
 from .queries import update_user_async_edgeql as update_user_qry
+from .timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 ################################
 # Search users
@@ -29,14 +57,32 @@ router = APIRouter()
     response_model=list[str],
     tags=["users"],
 )
-async def search_users_ilike(
+async def search_users(
     services: svcs.fastapi.DepContainer,
     name: Annotated[str | None, Query(max_length=50)] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.backend_max_page_size)] = (
+        settings.backend_search_limit
+    ),
 ):
+    """
+    Return at most `limit` usernames containing `name`, prefix matches first and
+    then ranked by trigram similarity. Without `name`, the first usernames in
+    alphabetical order are returned.
+    """
     db_client = await services.aget(AsyncIOClient)
-    return await search_users_by_name_ilike_qry.search_users_by_name_ilike(
-        db_client, name=name
+    executor = (
+        JSONExecutor(db_client) if settings.backend_json_passthrough else db_client
     )
+    if name:
+        usernames = await search_users_by_name_qry.search_users_by_name(
+            executor, name=name, limit=limit
+        )
+    else:
+        usernames = await get_user_names_qry.get_user_names(executor, limit=limit)
+
+    if settings.backend_json_passthrough:
+        return RawJSONResponse(usernames)
+    return usernames
 
 
 ################################
@@ -44,22 +90,122 @@ async def search_users_ilike(
 ################################
 
 
+async def _get_users_page(
+    db_client: AsyncIOClient, *, limit: int, after: str | None
+) -> dict:
+    after_created_at, after_id = None, None
+    if after is not None:
+        try:
+            after_created_at, after_id = decode_cursor(after, aware_datetime, uuid.UUID)
+        except InvalidCursorError:
+            err_msg = f"Invalid cursor '{after}'."
+            await async_ep_log("api.users", err_msg, CLogLevel.WARNING)
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail={"error": err_msg},
+            )
+
+    users = await get_users_page_qry.get_users_page(
+        db_client,
+        after_created_at=after_created_at,
+        after_id=after_id,
+        limit=limit + 1,
+    )
+    users, next_cursor = make_page(
+        users, limit, lambda user: (user.created_at, user.id)
+    )
+    return {"users": users, "next_cursor": next_cursor}
+
+
+async def _get_users_by_keys(
+    db_client: AsyncIOClient, *, names: str | None, ids: str | None
+) -> dict:
+    try:
+        names_, ids_ = parse_lookup_keys(names, ids)
+    except InvalidLookupKeysError as e:
+        err_msg = str(e)
+        await async_ep_log("api.users", err_msg, CLogLevel.WARNING)
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": err_msg},
+        )
+
+    users = await get_users_by_keys_qry.get_users_by_keys(
+        db_client, names=names_, ids=ids_
+    )
+    users, missing = match_lookup_keys(users, names_, ids_)
+    return {"users": users, "missing": missing}
+
+
+# Any of these selects less than the full list.
+_NOT_FULL_LIST_PARAMS = frozenset({"name", "names", "ids", "limit", "after"})
+
+
 @router.get(
     "/users",
     response_model=list[get_users_qry.GetUsersResult]
-    | get_user_by_name_qry.GetUserByNameResult,
+    | get_user_by_name_qry.GetUserByNameResult
+    | UsersPage
+    | UsersLookup,
     tags=["users"],
+    dependencies=[
+        concurrency_limit(
+            "users_list", when=without_query_params(_NOT_FULL_LIST_PARAMS)
+        )
+    ],
 )
 async def get_users(
     services: svcs.fastapi.DepContainer,
+    request: Request,
+    response: Response,
     name: Annotated[str | None, Query(max_length=50)] = None,
+    names: str | None = None,
+    ids: str | None = None,
+    limit: Annotated[int | None, Query(ge=1, le=settings.backend_max_page_size)] = None,
+    after: Annotated[str | None, Query(max_length=200)] = None,
 ):
-    db_client = await services.aget(AsyncIOClient)
+    """
+    With `names` and/or `ids`, comma-separated, the matching users are fetched
+    in a single query and returned in the requested order. The keys which
+    matched nothing are listed in `missing`.
+
+    Without `limit` and `after`, all users are returned as a list.
+    Otherwise, a page ordered by `created_at` is returned together with
+    `next_cursor`, which should be passed back as `after` to fetch the next page.
+
+    With `backend_json_passthrough` enabled, the full list and the single user
+    are sent as the JSON rendered by EdgeDB. Pages are always decoded, since
+    their size is already bounded by `limit`.
+
+    The full list and the single user are served from the `QueryCache`.
+    The full list, pages and the single user carry a strong `ETag`, and
+    a matching `If-None-Match` is answered with `304 Not Modified`.
+    """
+    db_client, cache = await services.aget(AsyncIOClient, QueryCache)
+    if names is not None or ids is not None:
+        return await _get_users_by_keys(db_client, names=names, ids=ids)
+    executor = (
+        JSONExecutor(db_client) if settings.backend_json_passthrough else db_client
+    )
     if name is None:
-        return await get_users_qry.get_users(db_client)
-    else:
-        if user := await get_user_by_name_qry.get_user_by_name(db_client, name=name):
-            return user
+        if limit is None and after is None:
+            users, etag = await cache.fetch_with_etag(get_users_qry.get_users, executor)
+            return etag_response(request, response, users, etag)
+        page = await _get_users_page(
+            db_client, limit=limit or settings.backend_page_size, after=after
+        )
+        # Rendered once, and the ETag hashed from the very text sent.
+        body = UsersPage.model_validate(page, from_attributes=True).model_dump_json()
+        return etag_response(request, response, body, make_etag(body))
+
+    # A name the filter has never seen doesn't exist, no need to ask EdgeDB.
+    user_filter = await services.aget(UserNameFilter)
+    if user_filter.might_contain(name):
+        user, etag = await cache.fetch_with_etag(
+            get_user_by_name_qry.get_user_by_name, executor, name=name
+        )
+        if user and user != "null":
+            return etag_response(request, response, user, etag)
 
     err_msg = f"Username '{name}' does not exist."
     await async_ep_log("api.users", err_msg, CLogLevel.WARNING)
@@ -81,9 +227,22 @@ async def get_users(
     tags=["users"],
 )
 async def post_user(services: svcs.fastapi.DepContainer, user: UserCreate):
-    db_client = await services.aget(AsyncIOClient)
+    """
+    With `backend_group_commit` enabled, the concurrent inserts are merged
+    into one statement by the `UserInsertBatcher`, answered the same way.
+    """
+    db_client, cache, user_filter, batcher = await services.aget(
+        AsyncIOClient, QueryCache, UserNameFilter, UserInsertBatcher
+    )
+    create_user = (
+        batcher.create_user
+        if settings.backend_group_commit
+        else create_user_qry.create_user
+    )
+    # Added before the insert, so no lookup misses the user once it exists.
+    user_filter.add(user.name)
     try:
-        return await create_user_qry.create_user(db_client, **user.model_dump())
+        created_user = await create_user(db_client, **user.model_dump())
     except edgedb.errors.ConstraintViolationError:
         err_msg = f"Username '{user.name}' already exists."
         await async_ep_log("api.users", err_msg, CLogLevel.WARNING)
@@ -91,6 +250,86 @@ async def post_user(services: svcs.fastapi.DepContainer, user: UserCreate):
             status_code=HTTPStatus.BAD_REQUEST,
             detail={"error": err_msg},
         )
+    else:
+        # A lookup of the name may have cached its absence.
+        invalidate_users(cache, [user.name])
+        return created_user
+
+
+async def _create_users_chunk(
+    db_client: AsyncIOClient,
+    cache: QueryCache,
+    user_filter: UserNameFilter,
+    chunk: list[tuple[int, UserCreate]],
+) -> list[BulkItemOut]:
+    for _, user in chunk:
+        user_filter.add(user.name)
+    results = await insert_deduplicated(
+        chunk,
+        lambda item: item[1].name,
+        lambda firsts: bulk_create_users_qry.bulk_create_users(
+            db_client, names=[user.name for _, user in firsts]
+        ),
+    )
+    invalidate_users(
+        cache, {user.name for (_, user), created in results if created is not None}
+    )
+
+    statuses = []
+    for (index, user), created in results:
+        if created is not None:
+            statuses.append(
+                BulkItemOut(index=index, name=user.name, status=BulkItemStatus.CREATED)
+            )
+        else:
+            statuses.append(
+                BulkItemOut(
+                    index=index,
+                    name=user.name,
+                    status=BulkItemStatus.DUPLICATE,
+                    error=f"Username '{user.name}' already exists.",
+                )
+            )
+    return statuses
+
+
+@router.post(
+    "/users/bulk",
+    response_model=BulkOut,
+    tags=["users"],
+    dependencies=[concurrency_limit("bulk")],
+)
+async def post_users_bulk(services: svcs.fastapi.DepContainer, request: Request):
+    """
+    Create users from a JSON array, or from an NDJSON stream
+    (`Content-Type: application/x-ndjson`), of `UserCreate` records.
+    They are inserted `backend_bulk_chunk_size` at a time, and every item is
+    reported as `created`, `duplicate` or `invalid` by its index in the payload.
+    A JSON array is answered with a `BulkOut` report, an NDJSON stream with
+    one `BulkItemOut` line per item. Only the NDJSON stream is read chunk by
+    chunk, a JSON array is read whole and refused with a 413 beyond
+    `backend_bulk_array_max_bytes`.
+    """
+    db_client, cache, user_filter = await services.aget(
+        AsyncIOClient, QueryCache, UserNameFilter
+    )
+    try:
+        items = await read_items(request, settings.backend_bulk_array_max_bytes)
+    except InvalidBulkPayloadError as e:
+        err_msg = str(e)
+        await async_ep_log("api.users", err_msg, CLogLevel.WARNING)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={"error": err_msg},
+        )
+
+    results = process_in_chunks(
+        items,
+        UserCreate,
+        lambda chunk: _create_users_chunk(db_client, cache, user_filter, chunk),
+        settings.backend_bulk_chunk_size,
+    )
+    return await bulk_response(request, results)
 
 
 ################################
@@ -107,7 +346,10 @@ async def put_user(
     services: svcs.fastapi.DepContainer,
     user: UserUpdate,
 ):
-    db_client = await services.aget(AsyncIOClient)
+    db_client, cache, user_filter = await services.aget(
+        AsyncIOClient, QueryCache, UserNameFilter
+    )
+    user_filter.add(user.new_name)
 
     try:
         updated_user = await update_user_qry.update_user(db_client, **user.model_dump())
@@ -120,6 +362,10 @@ async def put_user(
         )
     else:
         if updated_user:
+            invalidate_users(cache, [user.name, user.new_name])
+            # The hostname is part of every cached event of the user. Since we
+            # don't know which events those are, and renames are rare, drop them all.
+            invalidate_events(cache)
             return updated_user
 
     err_msg = f"User '{user.name}' was not found."
@@ -143,7 +389,7 @@ async def put_user(
 async def delete_user(
     services: svcs.fastapi.DepContainer, name: Annotated[str, Query(max_length=50)]
 ):
-    db_client = await services.aget(AsyncIOClient)
+    db_client, cache = await services.aget(AsyncIOClient, QueryCache)
     try:
         deleted_user = await delete_user_qry.delete_user(
             db_client,
@@ -158,6 +404,7 @@ async def delete_user(
         )
     else:
         if deleted_user:
+            invalidate_users(cache, [name])
             return deleted_user
 
     err_msg = f"User '{name}' was not found."
@@ -0,0 +1,139 @@
+import contextlib
+import importlib
+import inspect
+import pkgutil
+from collections.abc import Iterator
+from types import ModuleType
+from typing import Any
+
+import edgedb
+
+from . import queries
+from .logging import CLogLevel, async_ep_log
+
+_METHODS = frozenset(
+    {
+        "query",
+        "query_single",
+        "query_required_single",
+        "query_json",
+        "query_single_json",
+    }
+)
+# The queries of the request handlers, which all take a required argument.
+# The argument-less ones are left out, since warming them up would run them:
+# the `get_users`/`get_events` full scans, the `ping_db` health check, and the
+# startup and maintenance queries.
+WARM_UP_QUERIES = frozenset(
+    {
+        "bulk_create_events",
+        "bulk_create_users",
+        "bulk_upsert_event_hosts",
+        "create_event",
+        "create_user",
+        "delete_event",
+        "delete_user",
+        "get_event_by_name",
+        "get_events_by_keys",
+        "get_events_page_by_created_at",
+        "get_events_page_by_name",
+        "get_events_page_by_schedule",
+        "get_user_by_name",
+        "get_users_by_keys",
+        "get_users_page",
+        "search_users_by_name",
+        "update_event",
+        "update_user",
+    }
+)
+# What `JSONExecutor` runs instead.
+_JSON_METHODS = {"query": "query_json", "query_single": "query_single_json"}
+
+
+class _QueryRecorder:
+    """Stand in for an executor, remembering the queries instead of running them."""
+
+    def __init__(self):
+        self.queries: list[tuple[str, str]] = []
+
+    def __getattr__(self, method: str) -> Any:
+        if method not in _METHODS:
+            raise AttributeError(method)
+
+        async def record(query: str, *args: Any, **kwargs: Any) -> None:
+            self.queries.append((method, query))
+
+        return record
+
+
+def iter_query_modules() -> Iterator[ModuleType]:
+    for module_info in pkgutil.iter_modules(queries.__path__):
+        if module_info.name.endswith("_async_edgeql"):
+            yield importlib.import_module(f"{queries.__name__}.{module_info.name}")
+
+
+async def _record_queries(module: ModuleType) -> list[tuple[str, str]]:
+    recorder = _QueryRecorder()
+    for _, func in inspect.getmembers(module, inspect.iscoroutinefunction):
+        if func.__module__ != module.__name__:
+            continue
+        params = list(inspect.signature(func).parameters)[1:]
+        await func(recorder, **dict.fromkeys(params))
+    return recorder.queries
+
+
+class _Rollback(Exception):
+    pass
+
+
+async def _compile_query(
+    db_client: edgedb.AsyncIOClient, method: str, query: str
+) -> None:
+    """
+    Run `query` without arguments in a transaction which is rolled back.
+    EdgeDB compiles it before the client finds the arguments missing, so a
+    query taking a required one is never run.
+    """
+    with contextlib.suppress(_Rollback):
+        async for tx in db_client.transaction():
+            async with tx:
+                with contextlib.suppress(edgedb.QueryArgumentError):
+                    await getattr(tx, method)(query)
+                raise _Rollback
+
+
+async def warm_up_queries(
+    db_client: edgedb.AsyncIOClient, *, json_passthrough: bool = False
+) -> int:
+    """
+    Have EdgeDB compile the `WARM_UP_QUERIES` once, so the first requests
+    find them in its compiled-query cache. Each query is compiled in a
+    transaction which is rolled back, see `_compile_query`, so the writes are
+    warmed up too without touching any data.
+    With `json_passthrough`, the JSON variants some handlers run are warmed up
+    as well. Return the number of queries warmed up.
+    """
+    n_queries = 0
+    for module in iter_query_modules():
+        label = module.__name__.rpartition(".")[2].removesuffix("_async_edgeql")
+        if label not in WARM_UP_QUERIES:
+            continue
+        recorded = await _record_queries(module)
+        if json_passthrough:
+            recorded += [
+                (_JSON_METHODS[method], query)
+                for method, query in recorded
+                if method in _JSON_METHODS
+            ]
+        for method, query in recorded:
+            try:
+                await _compile_query(db_client, method, query)
+            except edgedb.EdgeDBError as e:
+                await async_ep_log(
+                    "api.db",
+                    f"Warm-up of {module.__name__} failed: {e!r}",
+                    CLogLevel.WARNING,
+                )
+                continue
+            n_queries += 1
+    return n_queries
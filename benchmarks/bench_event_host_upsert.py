@@ -0,0 +1,121 @@
+"""
+Compare the upsert of the host in `create_event` with the former
+select-then-insert, under concurrent creates of events sharing new hosts.
+
+Each round creates `--concurrency` events at once, `--per-host` of them
+hosted by the same new user. The queries run without the client retries,
+so that the retries on transient errors, and the creates which failed
+outright, are counted here.
+
+It needs a running EdgeDB instance linked to this project, and **DELETES ALL
+USERS AND EVENTS** while seeding:
+
+    $ python -m benchmarks.bench_event_host_upsert --concurrency 50 --per-host 10
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+
+import edgedb
+
+from app.queries import create_event_async_edgeql as create_event_qry
+
+from .common import seed_dev_data, summarize
+
+# The former `create_event`, which selects the host and inserts it if missing.
+CREATE_EVENT_SELECT_OR_INSERT = """\
+with name := <str>$name,
+    address := <optional str>$address ?? <str>{},
+    schedule := <datetime>(<optional str>$schedule ?? <str>{}),
+    host_name := <str>$host_name,
+select (
+    insert Event {
+        name := name,
+        address := address,
+        schedule := schedule,
+        host := (
+            with u:= assert_single((select User filter .name = host_name)),
+            select
+            if exists u then (u)
+            else (insert User {name:= host_name})
+        )
+    }
+) {name, address, schedule, host_name:=.host.name};\
+"""
+
+
+async def create_event_select_or_insert(executor, **kwargs):
+    return await executor.query_single(CREATE_EVENT_SELECT_OR_INSERT, **kwargs)
+
+
+QUERIES = {
+    "select-or-insert": create_event_select_or_insert,
+    "upsert": create_event_qry.create_event,
+}
+
+
+async def create_with_retries(db_client, create_event, *, name, host_name, attempts):
+    """Return the number of retries, and whether the event was created."""
+    for retry in range(attempts):
+        try:
+            await create_event(
+                db_client, name=name, address=None, schedule=None, host_name=host_name
+            )
+            return retry, True
+        except edgedb.errors.EdgeDBError as e:
+            if not e.has_tag(edgedb.errors.SHOULD_RETRY):
+                return retry, False
+            await asyncio.sleep(0.001 * 2**retry)
+    return attempts, False
+
+
+async def main(concurrency: int, per_host: int, rounds: int, attempts: int):
+    db_client = edgedb.create_async_client().with_retry_options(
+        edgedb.RetryOptions(attempts=1)
+    )
+    ids = itertools.count()
+
+    for label, create_event in QUERIES.items():
+        await seed_dev_data(db_client, n_events=0)
+        durations, retries, failures = [], 0, 0
+
+        async def create(name, host_name):
+            start = time.perf_counter_ns()
+            n_retries, created = await create_with_retries(
+                db_client,
+                create_event,
+                name=name,
+                host_name=host_name,
+                attempts=attempts,
+            )
+            durations.append((time.perf_counter_ns() - start) / 10**6)
+            return n_retries, created
+
+        for _ in range(rounds):
+            results = await asyncio.gather(
+                *(
+                    create(f"bench-event-{i}", f"bench-host-{i // per_host}")
+                    for i in itertools.islice(ids, concurrency)
+                )
+            )
+            retries += sum(n_retries for n_retries, _ in results)
+            failures += sum(not created for _, created in results)
+
+        print(
+            f"{label:<17} retries={retries:<6} failures={failures:<6} "
+            f"{summarize(durations)}"
+        )
+
+    await db_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--per-host", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--attempts", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.per_host, args.rounds, args.attempts))
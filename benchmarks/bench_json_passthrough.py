@@ -0,0 +1,59 @@
+"""
+Compare the decoded and the raw-JSON passthrough modes of the read endpoints.
+
+It needs a running EdgeDB instance linked to this project, and
+**DELETES ALL USERS AND EVENTS** while seeding:
+
+    $ python -m benchmarks.bench_json_passthrough --rows 10000 100000
+"""
+
+import argparse
+import asyncio
+import logging
+
+import edgedb
+
+from app.config import settings
+from app.lifespan import make_lifespan
+from app.main import make_app
+
+from .common import seed_dev_data, serve, summarize, timeit
+
+ENDPOINTS = [
+    ("/users", {}),
+    ("/events", {}),
+    ("/users/search", {"name": "bench-user-1"}),
+]
+
+
+async def main(rows: list[int], repeat: int):
+    logging.getLogger().setLevel(logging.WARNING)
+    # Time the queries themselves, not hits of the read cache.
+    settings.backend_cache_max_size = 0
+    app = make_app(make_lifespan(prefill=False))
+    db_client = edgedb.create_async_client()
+
+    async with serve(app) as client:
+        for n in rows:
+            await seed_dev_data(db_client, n_events=n)
+            for url, params in ENDPOINTS:
+                for passthrough in (False, True):
+                    settings.backend_json_passthrough = passthrough
+
+                    async def get():
+                        resp = await client.get(url, params=params)
+                        resp.raise_for_status()
+
+                    durations = await timeit(get, repeat=repeat)
+                    mode = "passthrough" if passthrough else "decoded"
+                    print(f"rows={n:<7} {url:<14} {mode:<12} {summarize(durations)}")
+
+    await db_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
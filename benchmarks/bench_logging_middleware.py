@@ -0,0 +1,69 @@
+"""
+Compare the requests per second of a trivial route behind the
+`BaseHTTPMiddleware`-based `add_logging_middleware` and behind the pure ASGI
+`LoggingMiddleware`. No database is needed:
+
+    $ python -m benchmarks.bench_logging_middleware --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from asgi_correlation_id import CorrelationIdMiddleware
+from fastapi import FastAPI
+
+from app import common
+from app.logging import CLogLevel, setup_logging
+from app.middlewares import LoggingMiddleware, add_logging_middleware
+
+from .common import serve
+
+
+def make_bench_app(*, pure_asgi: bool) -> FastAPI:
+    app = FastAPI()
+    if pure_asgi:
+        app.add_middleware(LoggingMiddleware)
+    else:
+        app.middleware("http")(add_logging_middleware)
+    app.add_middleware(CorrelationIdMiddleware)
+    app.include_router(common.router)
+    return app
+
+
+async def requests_per_second(app: FastAPI, *, requests: int, concurrency: int):
+    async with serve(app) as client:
+
+        async def worker(n: int):
+            for _ in range(n):
+                resp = await client.get("/")
+                resp.raise_for_status()
+
+        await worker(100)  # warmup
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(requests // concurrency) for _ in range(concurrency))
+        )
+        return requests // concurrency * concurrency / (time.perf_counter() - start)
+
+
+async def main(requests: int, concurrency: int, repeat: int):
+    # The access log is still built, only not written out.
+    setup_logging(json_logs=True, log_level=CLogLevel.WARNING)
+    for pure_asgi in (False, True):
+        app = make_bench_app(pure_asgi=pure_asgi)
+        rps = [
+            await requests_per_second(app, requests=requests, concurrency=concurrency)
+            for _ in range(repeat)
+        ]
+        mode = "pure ASGI" if pure_asgi else "BaseHTTPMiddleware"
+        print(f"{mode:<19} best={max(rps):9.1f} req/s worst={min(rps):9.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.repeat))
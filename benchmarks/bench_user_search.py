@@ -0,0 +1,57 @@
+"""
+Compare the indexed user search with the former unindexed `ilike` scan.
+
+It needs a running EdgeDB instance linked to this project (with the
+`pg_trgm` migration applied), and **DELETES ALL USERS AND EVENTS** while seeding:
+
+    $ python -m benchmarks.bench_user_search --users 100000 1000000
+"""
+
+import argparse
+import asyncio
+
+import edgedb
+
+from app.queries import search_users_by_name_async_edgeql as search_users_by_name_qry
+from app.queries import (
+    search_users_by_name_ilike_async_edgeql as search_users_by_name_ilike_qry,
+)
+
+from .common import seed_dev_data, summarize, timeit
+
+# From a keystroke to a full name, matching many to few users.
+TERMS = ["1", "12", "r-12", "user-123", "bench-user-12345"]
+
+
+async def main(users: list[int], repeat: int, limit: int):
+    db_client = edgedb.create_async_client()
+
+    for n in users:
+        await seed_dev_data(db_client, n_events=n)
+        for term in TERMS:
+            durations = await timeit(
+                lambda: search_users_by_name_ilike_qry.search_users_by_name_ilike(
+                    db_client, name=term
+                ),
+                repeat=repeat,
+            )
+            print(f"users={n:<8} {term!r:<20} ilike    {summarize(durations)}")
+
+            durations = await timeit(
+                lambda: search_users_by_name_qry.search_users_by_name(
+                    db_client, name=term, limit=limit
+                ),
+                repeat=repeat,
+            )
+            print(f"users={n:<8} {term!r:<20} indexed  {summarize(durations)}")
+
+    await db_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.repeat, args.limit))
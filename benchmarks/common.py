@@ -0,0 +1,80 @@
+import contextlib
+import json
+import statistics
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+import edgedb
+import httpx
+from fastapi import FastAPI
+
+from app.queries import set_default_dev_data_async_edgeql as set_default_dev_data_qry
+
+
+async def seed_dev_data(
+    db_client: edgedb.AsyncIOClient, *, n_events: int, n_hosts: int | None = None
+) -> None:
+    """
+    Replace **ALL USERS AND EVENTS** with `n_events` events hosted by `n_hosts`
+    users. Names are deterministic, so they never collide like the faker ones.
+    """
+    n_hosts = n_hosts or n_events
+    data = [
+        {
+            "name": f"bench-event-{i}",
+            "address": None,
+            "schedule": None,
+            "host_name": f"bench-user-{i % n_hosts}",
+        }
+        for i in range(n_events)
+    ]
+    await set_default_dev_data_qry.set_default_dev_data(
+        db_client, data=json.dumps(data)
+    )
+
+
+@contextlib.asynccontextmanager
+async def serve(app: FastAPI) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Run the lifespan of `app` and yield an in-process client for it.
+    `httpx.ASGITransport` neither runs the lifespan nor passes its state
+    (where `svcs` keeps the registry) to the requests, so we do both here.
+    """
+    async with app.router.lifespan_context(app) as state:
+
+        async def app_with_state(scope, receive, send):
+            scope["state"] = dict(state or {})
+            await app(scope, receive, send)
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app_with_state),
+            base_url="http://bench",
+            timeout=None,
+        ) as client:
+            yield client
+
+
+async def timeit(
+    fn: Callable[[], Awaitable[object]], *, repeat: int, warmup: int = 1
+) -> list[float]:
+    """Return the duration of each call in milliseconds."""
+    for _ in range(warmup):
+        await fn()
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        await fn()
+        durations.append((time.perf_counter_ns() - start) / 10**6)
+    return durations
+
+
+def summarize(durations: list[float]) -> str:
+    if len(durations) > 1:
+        p50, p99 = (statistics.quantiles(durations, n=100)[i] for i in (49, 98))
+    else:
+        p50 = p99 = durations[0]
+    return (
+        f"n={len(durations):<5} mean={statistics.fmean(durations):9.2f}ms "
+        f"p50={p50:9.2f}ms p99={p99:9.2f}ms"
+    )
@@ -4,8 +4,9 @@ from fastui import AnyComponent, FastUI, prebuilt_html
 from fastui import components as c
 
 from .shared import demo_page
+from .timing import TimedRoute
 
-router = APIRouter(include_in_schema=False)
+router = APIRouter(include_in_schema=False, route_class=TimedRoute)
 
 
 @router.get("/api/", response_model=FastUI, response_model_exclude_none=True)
@@ -3,7 +3,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 # from typing import Annotated
 # from pydantic import AfterValidator, HttpUrl
 # HttpUrlString = Annotated[HttpUrl, AfterValidator(str)]
-from .logging import CLogLevel
+from .logging import CLogLevel, LogOverflowPolicy
 
 
 class Settings(BaseSettings):
@@ -13,6 +13,16 @@ class Settings(BaseSettings):
     frontend_reload: bool = False
     frontend_log_json_format: bool = False
     frontend_log_level: CLogLevel = CLogLevel.INFO
+    # 0 writes the logs synchronously, otherwise they are queued for a writer thread.
+    frontend_log_queue_size: int = 0
+    frontend_log_queue_overflow: LogOverflowPolicy = LogOverflowPolicy.DROP
+    frontend_log_batch_size: int = 256
+    # Log 1 in N successful requests (0: none), errors and slow requests are always logged.
+    frontend_access_log_sample_rate: int = 1
+    frontend_access_log_slow_ms: float | None = None
+    # Seconds between the per-route summaries, 0 disables them.
+    frontend_access_log_summary_interval: float = 0
+    frontend_page_size: int = 20
 
     backend_schema: str = "http"
     backend_host: str = "localhost"
@@ -14,11 +14,13 @@ from .clients import (  # noqa: F401
     FrontendGetAsyncClient,
     FrontendPostPutDeleteAsyncClient,
 )
+from .config import settings
 from .forms import EventCreationForm, EventUpdateForm
 from .shared import demo_page
+from .timing import TimedRoute
 from .utils import _form_event_repr, _raise_for_status
 
-router = APIRouter(include_in_schema=False)
+router = APIRouter(include_in_schema=False, route_class=TimedRoute)
 
 
 @router.post(
@@ -183,11 +185,15 @@ async def event_deleteview(
 @router.get("/api/events/", response_model=FastUI, response_model_exclude_none=True)
 async def event_listview(
     services: svcs.fastapi.DepContainer,
+    after: str | None = None,
 ) -> list[AnyComponent]:
     client = await services.aget(BackendAsyncClient)
-    resp = await client.get("/events")
-    resp_json_list = _raise_for_status(resp, HTTPStatus.OK)
-    events = [_form_event_repr(resp_json) for resp_json in resp_json_list]
+    params = {"limit": settings.frontend_page_size}
+    if after is not None:
+        params["after"] = after
+    resp = await client.get("/events", params=params)
+    resp_json_page = _raise_for_status(resp, HTTPStatus.OK)
+    events = [_form_event_repr(resp_json) for resp_json in resp_json_page["events"]]
 
     page_comp_list = [
         c.Heading(text="Events", level=2),
@@ -242,4 +248,11 @@ async def event_listview(
                 ],
             ),
         )
+    if next_cursor := resp_json_page["next_cursor"]:
+        page_comp_list.append(
+            c.Link(
+                components=[c.Text(text="Next page")],
+                on_click=GoToEvent(url="/events/", query={"after": next_cursor}),
+            )
+        )
     return demo_page(*page_comp_list)
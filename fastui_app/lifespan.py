@@ -7,6 +7,7 @@ from .clients import (
     FrontendPostPutDeleteAsyncClient,  # noqa: F401
 )
 from .config import settings
+from .logging import flush_logging
 
 
 async def _lifespan(app: FastAPI, registry: svcs.Registry):
@@ -53,6 +54,8 @@ async def _lifespan(app: FastAPI, registry: svcs.Registry):
     yield
 
     await registry.aclose()
+    # The queued log records, including the shutdown ones, are written out.
+    flush_logging()
 
 
 def make_lifespan():
@@ -1,7 +1,11 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 from enum import Enum
-from typing import Any
+from typing import Any, TextIO
 
 import structlog
 from structlog.types import EventDict, Processor  # noqa: F401
@@ -15,6 +19,11 @@ class CLogLevel(str, Enum):
     CRITICAL = "critical"
 
 
+class LogOverflowPolicy(str, Enum):
+    DROP = "drop"
+    BLOCK = "block"
+
+
 async def async_ep_log(
     logger_name: str, err_msg: str, level: CLogLevel = CLogLevel.WARNING
 ) -> Any:
@@ -29,7 +38,103 @@ def ep_log(logger_name: str, err_msg: str, level: CLogLevel = CLogLevel.WARNING)
     func(err_msg)
 
 
-def setup_logging(json_logs: bool = False, log_level: CLogLevel = CLogLevel.INFO):
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Render the record in the logging thread, where the context variables are
+    still bound, and enqueue the text for `BatchLogWriter`. Once the queue is
+    full, the record is either dropped and counted, or the caller blocks until
+    the writer catches up.
+    """
+
+    def __init__(self, queue_: queue.Queue, *, overflow: LogOverflowPolicy):
+        super().__init__(queue_)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow is LogOverflowPolicy.BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchLogWriter(threading.Thread):
+    """
+    Write the records rendered by `BoundedQueueHandler` to `stream`, at most
+    `batch_size` of them per write, from a dedicated thread.
+    """
+
+    def __init__(
+        self,
+        queue_: queue.Queue,
+        stream: TextIO,
+        *,
+        batch_size: int,
+        handler: BoundedQueueHandler | None = None,
+    ):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = queue_
+        self.stream = stream
+        self.batch_size = batch_size
+        self.handler = handler
+        self._reported_dropped = 0
+
+    def run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = [f"{record.getMessage()}\n" for record in batch if record]
+            # Only the handler increments `dropped`, under its own lock.
+            if self.handler and self.handler.dropped > self._reported_dropped:
+                dropped = self.handler.dropped - self._reported_dropped
+                self._reported_dropped += dropped
+                lines.append(
+                    f"Dropped {dropped} log records, the log queue was full.\n"
+                )
+            try:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+            except Exception:
+                # A broken stream mustn't stop the writer, or the queue fills up.
+                pass
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+            if None in batch:
+                return
+
+
+_log_queue: queue.Queue | None = None
+
+
+def flush_logging() -> None:
+    """Wait until the queued records are written. Call it on shutdown."""
+    if _log_queue is not None:
+        _log_queue.join()
+
+
+def _stop_logging(log_queue: queue.Queue, writer: BatchLogWriter) -> None:
+    log_queue.put(None)
+    writer.join()
+
+
+def setup_logging(
+    json_logs: bool = False,
+    log_level: CLogLevel = CLogLevel.INFO,
+    *,
+    queue_size: int = 0,
+    overflow: LogOverflowPolicy = LogOverflowPolicy.DROP,
+    batch_size: int = 256,
+):
     """see https://gist.github.com/nymous/f138c7f06062b7c43c060bf03759c29e"""
     shared_processors: list[Processor] = [
         structlog.contextvars.merge_contextvars,
@@ -68,7 +173,20 @@ def setup_logging(json_logs: bool = False, log_level: CLogLevel = CLogLevel.INFO
         ],
     )
 
-    handler = logging.StreamHandler()
+    handler: logging.Handler
+    if queue_size > 0:
+        # Records are rendered by the callers and written by a dedicated thread,
+        # so slow stderr doesn't stall the event loop.
+        global _log_queue
+        _log_queue = queue.Queue(maxsize=queue_size)
+        handler = BoundedQueueHandler(_log_queue, overflow=overflow)
+        writer = BatchLogWriter(
+            _log_queue, sys.stderr, batch_size=batch_size, handler=handler
+        )
+        writer.start()
+        atexit.register(_stop_logging, _log_queue, writer)
+    else:
+        handler = logging.StreamHandler()
     handler.setFormatter(formatter)
     root_logger = logging.getLogger()
     root_logger.addHandler(handler)
@@ -12,17 +12,29 @@ from fastui_app import common, events, users
 from fastui_app.config import settings
 from fastui_app.lifespan import lifespan
 from fastui_app.logging import setup_logging
-from fastui_app.middlewares import add_logging_middleware  # noqa: F401
+from fastui_app.middlewares import (
+    LoggingMiddleware,
+    add_logging_middleware,  # noqa: F401
+)
 
 setup_logging(
-    json_logs=settings.frontend_log_json_format, log_level=settings.frontend_log_level
+    json_logs=settings.frontend_log_json_format,
+    log_level=settings.frontend_log_level,
+    queue_size=settings.frontend_log_queue_size,
+    overflow=settings.frontend_log_queue_overflow,
+    batch_size=settings.frontend_log_batch_size,
 )
 
 
 def make_app(lifespan):
     app = FastAPI(lifespan=lifespan)
 
-    app.middleware("http")(add_logging_middleware)
+    app.add_middleware(
+        LoggingMiddleware,
+        sample_rate=settings.frontend_access_log_sample_rate,
+        slow_ms=settings.frontend_access_log_slow_ms,
+        summary_interval=settings.frontend_access_log_summary_interval,
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -0,0 +1,126 @@
+"""
+Per-request phase timings, sent to the browser as a `Server-Timing` header
+by `LoggingMiddleware`.
+"""
+
+import contextvars
+import functools
+import inspect
+import re
+import time
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+_INVALID_NAME_CHARS = re.compile(r"[^\w.-]")
+
+
+class ServerTiming:
+    """
+    Durations in seconds by metric name, summed over repeated entries, e.g.
+    one per query. The route phases are set by `TimedRoute`:
+
+    - `parse`: reading the body, solving the dependencies and validating.
+    - `endpoint`: running the endpoint, which includes the `db-*` queries.
+    - `serialize`: validating and encoding what the endpoint returned.
+    """
+
+    def __init__(self):
+        # name => [count, seconds]
+        self._metrics: dict[str, list[float]] = {}
+        self.route_duration = 0.0
+        self._endpoint_start: float | None = None
+        self._endpoint_end: float | None = None
+
+    def add(self, name: str, duration: float) -> None:
+        metric = self._metrics.setdefault(_INVALID_NAME_CHARS.sub("_", name), [0, 0.0])
+        metric[0] += 1
+        metric[1] += duration
+
+    def _close_route(self, start: float, end: float) -> None:
+        self.route_duration += end - start
+        if self._endpoint_start is None:
+            self.add("parse", end - start)
+            return
+        self.add("parse", self._endpoint_start - start)
+        if self._endpoint_end is not None:
+            self.add("endpoint", self._endpoint_end - self._endpoint_start)
+            self.add("serialize", end - self._endpoint_end)
+
+    def header(self, total: float) -> str:
+        """
+        Render the metrics, with the time spent outside the route as
+        `middleware` and the time until the response started as `total`.
+        """
+        metrics = [
+            *self._metrics.items(),
+            ("middleware", [1, max(total - self.route_duration, 0.0)]),
+            ("total", [1, total]),
+        ]
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.3f}"
+            + (f';desc="{int(count)} calls"' if count > 1 else "")
+            for name, (count, seconds) in metrics
+        )
+
+
+# Set by the logging middleware per request.
+server_timing: contextvars.ContextVar[ServerTiming | None] = contextvars.ContextVar(
+    "server_timing", default=None
+)
+
+
+def record(name: str, duration: float) -> None:
+    """Add `duration` to the current request, if any."""
+    if (timing := server_timing.get()) is not None:
+        timing.add(name, duration)
+
+
+def _timed_endpoint(
+    endpoint: Callable[..., Coroutine[Any, Any, Any]],
+) -> Callable[..., Coroutine[Any, Any, Any]]:
+    # `functools.wraps` keeps the signature FastAPI builds the dependencies from.
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        timing = server_timing.get()
+        if timing is not None:
+            timing._endpoint_start = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            if timing is not None:
+                timing._endpoint_end = time.perf_counter()
+
+    wrapper._is_timed = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    An `APIRoute` recording its `parse`, `endpoint` and `serialize` phases in
+    `server_timing`. Sync endpoints are left alone, so they still run in the
+    threadpool. Like a request failing validation, their whole route is then
+    reported as `parse`.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        # `include_router` creates the routes again, from the wrapped endpoints.
+        if inspect.iscoroutinefunction(endpoint) and not hasattr(endpoint, "_is_timed"):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            if (timing := server_timing.get()) is None:
+                return await handler(request)
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                timing._close_route(start, time.perf_counter())
+
+        return timed_handler
@@ -14,11 +14,13 @@ from .clients import (  # noqa: F401
     FrontendGetAsyncClient,
     FrontendPostPutDeleteAsyncClient,
 )
+from .config import settings
 from .forms import DefaultDevDataForm, UserCreationForm, UserUpdateForm
 from .shared import demo_page
+from .timing import TimedRoute
 from .utils import _form_user_repr, _raise_for_status
 
-router = APIRouter(include_in_schema=False)
+router = APIRouter(include_in_schema=False, route_class=TimedRoute)
 
 
 # TODO: Not ready
@@ -206,15 +208,19 @@ async def user_deleteview(
 @router.get("/api/users/", response_model=FastUI, response_model_exclude_none=True)
 async def user_listview(
     services: svcs.fastapi.DepContainer,
+    after: str | None = None,
 ) -> list[AnyComponent]:
     """
     Show a table of four users, `/api` is the endpoint the frontend will connect to
     when a user visits `/` to fetch components to render.
     """
     client = await services.aget(BackendAsyncClient)
-    resp = await client.get("/users")
-    resp_json_list = _raise_for_status(resp, HTTPStatus.OK)
-    users = [_form_user_repr(resp_json) for resp_json in resp_json_list]
+    params = {"limit": settings.frontend_page_size}
+    if after is not None:
+        params["after"] = after
+    resp = await client.get("/users", params=params)
+    resp_json_page = _raise_for_status(resp, HTTPStatus.OK)
+    users = [_form_user_repr(resp_json) for resp_json in resp_json_page["users"]]
     page_comp_list = [
         c.Heading(text="Users", level=2),
         c.Div(
@@ -289,5 +295,12 @@ async def user_listview(
                 ],
             ),
         )
+    if next_cursor := resp_json_page["next_cursor"]:
+        page_comp_list.append(
+            c.Link(
+                components=[c.Text(text="Next page")],
+                on_click=GoToEvent(url="/users/", query={"after": next_cursor}),
+            )
+        )
 
     return demo_page(*page_comp_list)
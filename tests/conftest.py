@@ -6,6 +6,7 @@ from edgedb.asyncio_client import AsyncIOClient
 from fastapi.testclient import TestClient
 from structlog.testing import LogCapture
 
+from app.lifespan import register_services
 from app.main import make_app
 
 from .lifespan import t_lifespan
@@ -47,6 +48,15 @@ def test_db_client():
     yield Mock(spec_set=AsyncIOClient)
 
 
+@pytest.fixture(scope="function", autouse=True)
+def test_services():
+    """
+    Fresh services per test, registered like the app's, so no state leaks
+    between the mocked clients.
+    """
+    yield register_services(t_lifespan.registry)
+
+
 @pytest.fixture(scope="function")
 def log_output():
     return LogCapture()
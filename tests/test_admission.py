@@ -0,0 +1,126 @@
+import asyncio
+from http import HTTPStatus
+
+import httpx
+import pytest
+from starlette.responses import PlainTextResponse
+
+from app import metrics
+from app.admission import AdmissionMiddleware, Priority, classify
+
+
+################################
+# Fixtures
+################################
+class GatedApp:
+    """Serve requests in order of arrival, holding `/block` until `gate` is set."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.served: list[str] = []
+
+    async def __call__(self, scope, receive, send):
+        self.served.append(f"{scope['method']} {scope['path']}")
+        if scope["path"] == "/block":
+            await self.gate.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+
+
+def _make_client(app, **kwargs):
+    middleware = AdmissionMiddleware(app, **kwargs)
+    transport = httpx.ASGITransport(app=middleware)
+    return httpx.AsyncClient(transport=transport, base_url="http://testserver")
+
+
+async def _start(client, method, url):
+    task = asyncio.create_task(client.request(method, url))
+    # Let the request reach the middleware before the next one.
+    await asyncio.sleep(0.01)
+    return task
+
+
+################################
+# Good cases
+################################
+def test_classify():
+    assert classify({"path": "/readyz", "method": "GET"}) == Priority.HEALTH
+    assert classify({"path": "/users", "method": "GET"}) == Priority.READ
+    assert classify({"path": "/users", "method": "POST"}) == Priority.WRITE
+    assert classify({"path": "/reset", "method": "POST"}) == Priority.RESET
+
+
+@pytest.mark.asyncio
+async def test_admission_by_priority():
+    app = GatedApp()
+    async with _make_client(
+        app, max_in_flight=1, max_queue=10, queue_timeout=5
+    ) as client:
+        blocking = await _start(client, "GET", "/block")
+        queued = [
+            await _start(client, "POST", "/reset"),
+            await _start(client, "POST", "/users"),
+            await _start(client, "GET", "/users"),
+            await _start(client, "GET", "/healthy"),
+        ]
+        assert metrics.admission_queue_depth.get() == 4
+
+        app.gate.set()
+        responses = await asyncio.gather(blocking, *queued)
+
+    assert [response.status_code for response in responses] == [HTTPStatus.OK] * 5
+    assert app.served == [
+        "GET /block",
+        "GET /healthy",
+        "GET /users",
+        "POST /users",
+        "POST /reset",
+    ]
+    assert metrics.admission_in_flight.get() == 0
+    assert metrics.admission_queue_depth.get() == 0
+
+
+################################
+# Bad cases
+################################
+@pytest.mark.asyncio
+async def test_shed_after_queue_timeout():
+    app = GatedApp()
+    shed = metrics.admission_shed_total.get("read", "timeout")
+    async with _make_client(
+        app, max_in_flight=1, max_queue=10, queue_timeout=0.05, retry_after=3
+    ) as client:
+        blocking = await _start(client, "GET", "/block")
+        response = await client.get("/users")
+        app.gate.set()
+        await blocking
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "3"
+    assert "overloaded" in response.json()["detail"]["error"]
+    assert metrics.admission_shed_total.get("read", "timeout") == shed + 1
+    assert app.served == ["GET /block"]
+
+
+@pytest.mark.asyncio
+async def test_shed_when_queue_full():
+    app = GatedApp()
+    async with _make_client(
+        app, max_in_flight=1, max_queue=1, queue_timeout=5
+    ) as client:
+        blocking = await _start(client, "GET", "/block")
+        write = await _start(client, "POST", "/users")
+        # Outranks the queued write, which is shed.
+        health = await _start(client, "GET", "/healthy")
+        # Doesn't outrank the queued health check, so it's shed itself.
+        read = await _start(client, "GET", "/users")
+
+        app.gate.set()
+        responses = await asyncio.gather(blocking, write, health, read)
+
+    assert [response.status_code for response in responses] == [
+        HTTPStatus.OK,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.OK,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+    ]
+    assert app.served == ["GET /block", "GET /healthy"]
@@ -0,0 +1,354 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from edgedb.asyncio_client import AsyncIOClient
+
+from app import metrics
+from app.cache import QueryCache, invalidate_events, invalidate_users
+from app.executors import JSONExecutor
+from app.metrics import InstrumentedExecutor, RequestDBTime
+from app.queries import create_event_async_edgeql as create_event_qry
+from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from app.queries import get_users_async_edgeql as get_users_qry
+from app.queries import update_event_async_edgeql as update_event_qry
+
+from .factories import TestUserDataWithnEvents, gen_event
+from .lifespan import t_lifespan
+
+
+################################
+# Fixtures
+################################
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def clock():
+    return FakeClock()
+
+
+################################
+# Good cases
+################################
+@pytest.mark.asyncio
+async def test_cache_hit_and_miss(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+    test_db_client.query_single.return_value = None
+
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="b")
+    await cache.fetch(
+        get_user_by_name_qry.get_user_by_name, JSONExecutor(test_db_client), name="a"
+    )
+
+    assert test_db_client.query_single.await_count == 2
+    assert test_db_client.query_single_json.await_count == 1
+    assert cache.stats() == {
+        "size": 3,
+        "max_size": 10,
+        "hits": 1,
+        "misses": 3,
+        "coalesced": 0,
+        "evictions": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_and_size(test_db_client, clock):
+    cache = QueryCache(max_size=2, ttl=10, clock=clock)
+    test_db_client.query_single.return_value = None
+
+    for name in ("a", "b", "c"):
+        await cache.fetch(
+            get_user_by_name_qry.get_user_by_name, test_db_client, name=name
+        )
+    assert cache.stats()["size"] == 2
+    assert cache.evictions == 1
+
+    clock.now = 11
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="c")
+
+    assert cache.hits == 0
+    assert cache.misses == 4
+    assert cache.evictions == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidate(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+    test_db_client.query.return_value = []
+    test_db_client.query_single.return_value = None
+
+    await cache.fetch(get_users_qry.get_users, test_db_client)
+    for name in ("a", "b"):
+        await cache.fetch(
+            get_user_by_name_qry.get_user_by_name, test_db_client, name=name
+        )
+        await cache.fetch(
+            get_user_by_name_qry.get_user_by_name,
+            JSONExecutor(test_db_client),
+            name=name,
+        )
+
+    invalidate_users(cache, ["a"])
+
+    assert cache.stats()["size"] == 2
+    invalidate_users(cache)
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_skips_store_after_concurrent_invalidation(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+
+    async def query_single(*args, **kwargs):
+        invalidate_users(cache, ["a"])
+        return None
+
+    test_db_client.query_single.side_effect = query_single
+
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_single_flight(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+    release = asyncio.Event()
+
+    async def query_single(*args, **kwargs):
+        await release.wait()
+        return None
+
+    test_db_client.query_single.side_effect = query_single
+
+    leader = asyncio.create_task(
+        cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    )
+    await asyncio.sleep(0)
+    followers = [
+        asyncio.create_task(
+            cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+        )
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    # The followers don't fail with the request which started the query.
+    leader.cancel()
+    release.set()
+
+    assert await asyncio.gather(*followers) == [None] * 3
+    assert leader.cancelled()
+    assert test_db_client.query_single.await_count == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 3
+    assert cache.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_single_flight_not_joined_after_invalidation(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+    release = asyncio.Event()
+
+    async def query_single(*args, **kwargs):
+        await release.wait()
+        return None
+
+    test_db_client.query_single.side_effect = query_single
+
+    before = asyncio.create_task(
+        cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    )
+    await asyncio.sleep(0)
+    invalidate_users(cache, ["a"])
+    after = asyncio.create_task(
+        cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    )
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+
+    assert test_db_client.query_single.await_count == 2
+    assert cache.stats()["coalesced"] == 0
+    assert cache.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_single_flight_joined_after_other_invalidation(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+    release = asyncio.Event()
+
+    async def query_single(*args, **kwargs):
+        await release.wait()
+        return None
+
+    test_db_client.query_single.side_effect = query_single
+
+    before = asyncio.create_task(
+        cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    )
+    await asyncio.sleep(0)
+    invalidate_users(cache, ["b"])
+    invalidate_events(cache)
+    after = asyncio.create_task(
+        cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    )
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+
+    assert test_db_client.query_single.await_count == 1
+    assert cache.stats()["coalesced"] == 1
+    assert cache.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_single_flight_db_time(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+    executor = InstrumentedExecutor(test_db_client)
+    test_db_client.query_single.return_value = None
+
+    async def fetch():
+        db_time = RequestDBTime()
+        metrics.request_db_time.set(db_time)
+        await cache.fetch(get_user_by_name_qry.get_user_by_name, executor, name="a")
+        return db_time
+
+    leader, follower = await asyncio.gather(fetch(), fetch())
+
+    # Each request waited for the query, neither ran it in its context.
+    assert leader.n_queries == follower.n_queries == 1
+    assert leader.duration == follower.duration > 0
+
+
+def test_get_users_cached_until_post_event(
+    test_db_client, test_client, users_url, events_url
+):
+    user = TestUserDataWithnEvents()
+    event = gen_event()
+    event.host_name = user.name
+
+    test_db_client.query_single.side_effect = [
+        get_user_by_name_qry.GetUserByNameResult(**user.model_dump()),
+        create_event_qry.CreateEventResult(
+            **event.model_dump(
+                include={"id", "name", "address", "schedule", "host_name"}
+            )
+        ),
+        get_user_by_name_qry.GetUserByNameResult(**user.model_dump() | {"n_events": 1}),
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    responses = [
+        test_client.get(users_url, params={"name": user.name}) for _ in range(2)
+    ]
+    test_client.post(
+        events_url,
+        json=event.model_dump(include={"name", "address", "schedule", "host_name"}),
+    )
+    response = test_client.get(users_url, params={"name": user.name})
+
+    assert [response.json()["n_events"] for response in responses] == [0, 0]
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["n_events"] == 1
+    assert test_db_client.query_single.call_count == 3
+
+    response = test_client.get("/cache/stats")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() | {"max_size": None} == {
+        "size": 1,
+        "max_size": None,
+        "hits": 1,
+        "misses": 2,
+        "coalesced": 0,
+        "evictions": 0,
+    }
+
+
+def test_put_event_invalidates_both_hosts(
+    test_db_client, test_client, users_url, events_url
+):
+    orig_host, new_host = TestUserDataWithnEvents(), TestUserDataWithnEvents()
+    event = gen_event()
+    event.host_name = new_host.name
+
+    test_db_client.query_single.side_effect = [
+        get_user_by_name_qry.GetUserByNameResult(**orig_host.model_dump()),
+        get_user_by_name_qry.GetUserByNameResult(**new_host.model_dump()),
+        update_event_qry.UpdateEventResult(
+            **event.model_dump(
+                include={"id", "name", "address", "schedule", "host_name"}
+            ),
+            orig_host_name=orig_host.name,
+        ),
+        get_user_by_name_qry.GetUserByNameResult(**orig_host.model_dump()),
+        get_user_by_name_qry.GetUserByNameResult(**new_host.model_dump()),
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    for host in (orig_host, new_host):
+        test_client.get(users_url, params={"name": host.name})
+    test_client.put(
+        events_url,
+        json={"new_name": None}
+        | event.model_dump(include={"name", "address", "schedule", "host_name"}),
+    )
+    for host in (orig_host, new_host):
+        test_client.get(users_url, params={"name": host.name})
+
+    assert test_db_client.query_single.call_count == 5
+
+
+@pytest.mark.asyncio
+async def test_cache_negative_ttl(test_db_client, clock):
+    cache = QueryCache(max_size=10, ttl=10, negative_ttl=2, clock=clock)
+    test_db_client.query_single.return_value = None
+
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    clock.now = 1
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    assert test_db_client.query_single.await_count == 1
+
+    clock.now = 3
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    assert test_db_client.query_single.await_count == 2
+
+
+################################
+# Bad cases
+################################
+@pytest.mark.asyncio
+async def test_cache_single_flight_error(test_db_client):
+    cache = QueryCache(max_size=10, ttl=10)
+
+    async def query_single(*args, **kwargs):
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    test_db_client.query_single.side_effect = query_single
+
+    results = await asyncio.gather(
+        *(
+            cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+            for _ in range(3)
+        ),
+        return_exceptions=True,
+    )
+
+    assert [type(result) for result in results] == [RuntimeError] * 3
+    assert test_db_client.query_single.await_count == 1
+    assert cache.stats()["size"] == 0
+
+    test_db_client.query_single.side_effect = None
+    test_db_client.query_single.return_value = None
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, test_db_client, name="a")
+    assert test_db_client.query_single.await_count == 2
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import httpx
+import pytest
+
+from fastui_app.clients import BackendAsyncClient
+
+
+################################
+# Fixtures
+################################
+@pytest.fixture(scope="function")
+def sent_requests():
+    return []
+
+
+@pytest.fixture(scope="function")
+def transport(sent_requests):
+    """A backend tagging every path with its own `ETag`, and honoring them."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent_requests.append(request)
+        etag = f'"{request.url.path}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+        return httpx.Response(
+            HTTPStatus.OK, headers={"ETag": etag}, json={"path": request.url.path}
+        )
+
+    return httpx.MockTransport(handler)
+
+
+################################
+# Good cases
+################################
+@pytest.mark.asyncio
+async def test_backend_client_revalidates(transport, sent_requests):
+    async with BackendAsyncClient(
+        base_url="http://backend", transport=transport
+    ) as client:
+        first = await client.get("/users")
+        second = await client.get("/users")
+
+    assert "if-none-match" not in sent_requests[0].headers
+    assert sent_requests[1].headers["if-none-match"] == '"/users"'
+    assert first.status_code == second.status_code == HTTPStatus.OK
+    assert second.json() == first.json() == {"path": "/users"}
+    assert second.headers["etag"] == '"/users"'
+
+
+@pytest.mark.asyncio
+async def test_backend_client_lru_eviction(transport, sent_requests):
+    async with BackendAsyncClient(
+        base_url="http://backend", transport=transport, max_validated_responses=2
+    ) as client:
+        for path in ("/a", "/b", "/a", "/c", "/b", "/a"):
+            response = await client.get(path)
+            assert response.status_code == HTTPStatus.OK
+            assert response.json() == {"path": path}
+
+    # "/a" was used again after "/b", so "/b" was the one evicted by "/c",
+    # and then "/a" by "/b".
+    assert [request.headers.get("if-none-match") for request in sent_requests] == [
+        None,
+        None,
+        '"/a"',
+        None,
+        None,
+        None,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backend_client_not_get(transport, sent_requests):
+    async with BackendAsyncClient(
+        base_url="http://backend", transport=transport
+    ) as client:
+        await client.get("/users")
+        response = await client.post("/users", json={})
+
+    assert response.status_code == HTTPStatus.OK
+    assert "if-none-match" not in sent_requests[1].headers
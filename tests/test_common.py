@@ -1,5 +1,17 @@
 from http import HTTPStatus
 
+import pytest
+import svcs
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.cache import QueryCache
+from app.config import settings
+from app.group_commit import UserInsertBatcher
+from app.health import HealthCheckCache
+from app.lifespan import register_services
+from app.middlewares import AccessLogSummary, LoggingMiddleware
+
 
 def test_home(test_client):
     response = test_client.get("/")
@@ -7,3 +19,87 @@ def test_home(test_client):
 
     assert response.status_code == HTTPStatus.OK
     assert resp_json["message"] == "Hello World from FastAPI"
+
+
+def test_logging_middleware(test_client, log_output):
+    response = test_client.get("/", params={"q": "1"})
+    access_log = log_output.entries[-1]
+
+    assert response.status_code == HTTPStatus.OK
+    assert float(response.headers["X-Process-Time"]) >= 0
+    assert access_log["event"].endswith('"GET /?q=1 HTTP/1.1" 200')
+    assert access_log["http"]["url"] == "http://testserver/?q=1"
+    assert access_log["http"]["status_code"] == HTTPStatus.OK
+    assert access_log["duration"] > 0
+
+
+def test_logging_middleware_sampling(log_output):
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware, sample_rate=3, summary_interval=0.000001)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id < 0:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+        return {"item_id": item_id}
+
+    with TestClient(app) as client:
+        for item_id in (1, 2, 3, 4, -1):
+            client.get(f"/items/{item_id}")
+
+    access_logs = [entry for entry in log_output.entries if "http" in entry]
+    summaries = [entry for entry in log_output.entries if "route" in entry]
+
+    assert [entry["http"]["url"] for entry in access_logs] == [
+        "http://testserver/items/3",
+        "http://testserver/items/-1",
+    ]
+    assert summaries[-1]["route"] == "GET /items/{item_id}"
+    assert summaries[-1]["count"] == 1
+    assert summaries[-1]["errors"] == 1
+
+
+def test_access_log_summary():
+    now = 0.0
+    summary = AccessLogSummary(60, clock=lambda: now)
+    for duration_ms in range(1, 101):
+        summary.add("GET /users", HTTPStatus.OK, duration_ms)
+    summary.add("POST /users", HTTPStatus.BAD_REQUEST, 5)
+
+    assert summary.pop_due() == {}
+
+    now = 60.0
+    route_summaries = summary.pop_due()
+
+    assert route_summaries["GET /users"]["count"] == 100
+    assert route_summaries["GET /users"]["errors"] == 0
+    # Estimated within the width of a bucket.
+    assert route_summaries["GET /users"]["p50_ms"] == pytest.approx(50.5, rel=0.25)
+    assert route_summaries["GET /users"]["p99_ms"] == pytest.approx(99, rel=0.25)
+    assert route_summaries["GET /users"]["max_ms"] == 100
+    assert route_summaries["POST /users"] == {
+        "count": 1,
+        "errors": 1,
+        "p50_ms": 5,
+        "p90_ms": 5,
+        "p99_ms": 5,
+        "max_ms": 5,
+    }
+    assert summary.pop_due() == {}
+
+
+def test_register_services(mocker):
+    mocker.patch.object(settings, "backend_cache_negative_ttl", 0.5)
+    mocker.patch.object(settings, "backend_name_filter", True)
+    mocker.patch.object(settings, "backend_route_concurrency", {"bulk": 3})
+    registry = svcs.Registry()
+
+    services = register_services(registry)
+    container = svcs.Container(registry)
+
+    assert services.cache.negative_ttl == 0.5
+    assert services.user_filter.enabled and services.event_filter.enabled
+    assert services.route_limiter.budgets == {"bulk": 3}
+    assert container.get(QueryCache) is services.cache
+    assert container.get(UserInsertBatcher) is services.batcher
+    assert container.get(HealthCheckCache) is services.health_check_cache
@@ -0,0 +1,60 @@
+import pytest
+
+from app.consistency import check_user_n_events
+from app.queries import fix_user_n_events_drift_async_edgeql as fix_user_n_events_qry
+from app.queries import get_user_n_events_drift_async_edgeql as get_user_n_events_qry
+
+from .factories import faker
+
+
+################################
+# Good cases
+################################
+@pytest.mark.asyncio
+async def test_check_user_n_events_no_drift(test_db_client, log_output):
+    test_db_client.query.return_value = []
+
+    drifted_users = await check_user_n_events(test_db_client, fix=True)
+
+    assert drifted_users == []
+    assert log_output.entries == []
+    test_db_client.query.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_user_n_events_drift(test_db_client, log_output):
+    user = get_user_n_events_qry.GetUserNEventsDriftResult(
+        id=faker.uuid4(), name=faker.name(), n_events=1, actual_n_events=2
+    )
+    test_db_client.query.return_value = [user]
+
+    drifted_users = await check_user_n_events(test_db_client)
+    err_msg = f"User '{user.name}' has n_events=1, expected 2."
+
+    assert drifted_users == [user]
+    assert log_output.entries == [{"event": err_msg, "log_level": "warning"}]
+    test_db_client.query.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_user_n_events_fix(test_db_client, log_output):
+    user = get_user_n_events_qry.GetUserNEventsDriftResult(
+        id=faker.uuid4(), name=faker.name(), n_events=1, actual_n_events=2
+    )
+    test_db_client.query.side_effect = [
+        [user],
+        [
+            fix_user_n_events_qry.FixUserNEventsDriftResult(
+                id=user.id, name=user.name, n_events=2
+            )
+        ],
+    ]
+
+    drifted_users = await check_user_n_events(test_db_client, fix=True)
+
+    assert drifted_users == [user]
+    assert log_output.entries[-1] == {
+        "event": "Fixed n_events of 1 users.",
+        "log_level": "info",
+    }
+    assert test_db_client.query.await_count == 2
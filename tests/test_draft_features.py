@@ -1,7 +1,10 @@
+import json
 from http import HTTPStatus
 
 from edgedb.asyncio_client import AsyncIOClient
 
+from app.config import settings
+
 from .lifespan import t_lifespan
 
 
@@ -32,3 +35,45 @@ def test_search_users_ilike_filter(test_db_client, test_client):
 
     assert response.status_code == HTTPStatus.OK
     assert set(resp_json) == set(return_value)
+
+
+def test_search_users_limit(test_db_client, test_client):
+    search_user_ilike_url = "/users/search"
+    return_value = ["Jerry"]
+    test_db_client.query.return_value = return_value
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(search_user_ilike_url, params={"name": "j", "limit": 1})
+    resp_json = response.json()
+    _, kwargs = test_db_client.query.call_args
+
+    assert response.status_code == HTTPStatus.OK
+    assert resp_json == return_value
+    assert kwargs == {"name": "j", "limit": 1}
+
+
+def test_search_users_default_limit(test_db_client, test_client):
+    search_user_ilike_url = "/users/search"
+    test_db_client.query.return_value = []
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(search_user_ilike_url)
+    _, kwargs = test_db_client.query.call_args
+
+    assert response.status_code == HTTPStatus.OK
+    assert kwargs == {"limit": settings.backend_search_limit}
+
+
+def test_search_users_ilike_json_passthrough(mocker, test_db_client, test_client):
+    mocker.patch.object(settings, "backend_json_passthrough", True)
+    search_user_ilike_url = "/users/search"
+    return_value = ["Jerry", "Julia"]
+    test_db_client.query_json.return_value = json.dumps(return_value)
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(search_user_ilike_url, params={"name": "j"})
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert resp_json == return_value
+    test_db_client.query.assert_not_called()
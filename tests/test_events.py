@@ -2,12 +2,26 @@ from .utils import assert_datetime_equal
 from .lifespan import t_lifespan
 from .factories import gen_event
 from app.queries import update_event_async_edgeql as update_event_qry
+from app.queries import (
+    get_events_page_by_schedule_async_edgeql as get_events_page_by_schedule_qry,
+)
+from app.queries import (
+    get_events_page_by_created_at_async_edgeql as get_events_page_by_created_at_qry,
+)
+from app.queries import get_events_by_keys_async_edgeql as get_events_by_keys_qry
 from app.queries import get_events_async_edgeql as get_events_qry
 from app.queries import get_event_by_name_async_edgeql as get_event_by_name_qry
 from app.queries import delete_event_async_edgeql as delete_event_qry
 from app.queries import create_event_async_edgeql as create_event_qry
+from app.queries import bulk_create_events_async_edgeql as bulk_create_events_qry
+from app.pagination import encode_cursor, decode_cursor
+from app.config import settings
+import pytest
 from edgedb.asyncio_client import AsyncIOClient
 import edgedb
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+import json
 from http import HTTPStatus
 
 
@@ -64,6 +78,131 @@ def test_get_events(test_db_client, test_client, events_url):
     assert second_event["host_name"] == event_dict2["host_name"]
 
 
+def test_get_events_json_passthrough(mocker, test_db_client, test_client, events_url):
+    mocker.patch.object(settings, "backend_json_passthrough", True)
+    event_dicts = [gen_event().model_dump(mode="json") for _ in range(2)]
+
+    test_db_client.query_json.return_value = json.dumps(event_dicts)
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(events_url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == event_dicts
+    test_db_client.query.assert_not_called()
+
+
+def test_get_events_page(test_db_client, test_client, events_url):
+    events = [gen_event() for _ in range(3)]
+    event_dicts = [event.model_dump() for event in events]
+
+    test_db_client.query.return_value = [
+        get_events_page_by_created_at_qry.GetEventsPageByCreatedAtResult(**event_dict)
+        for event_dict in event_dicts
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(
+        events_url, params={"limit": 2, "host_name": events[0].host_name}
+    )
+    resp_json = response.json()
+    _, kwargs = test_db_client.query.call_args
+
+    assert response.status_code == HTTPStatus.OK
+    assert kwargs["limit"] == 3
+    assert kwargs["host_name"] == events[0].host_name
+    assert kwargs["schedule_from"] is None
+    assert kwargs["after_created_at"] is None
+    assert [event["name"] for event in resp_json["events"]] == [
+        event_dict["name"] for event_dict in event_dicts[:2]
+    ]
+    order_by, created_at, event_id = decode_cursor(
+        resp_json["next_cursor"], str, str, str
+    )
+    assert order_by == "created_at"
+    assert_datetime_equal(created_at, event_dicts[1]["created_at"])
+    assert event_id == event_dicts[1]["id"]
+
+
+def test_get_events_page_etag(test_db_client, test_client, events_url):
+    event = gen_event()
+
+    test_db_client.query.return_value = [
+        get_events_page_by_created_at_qry.GetEventsPageByCreatedAtResult(
+            **event.model_dump()
+        )
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(events_url, params={"limit": 2})
+    etag = response.headers["etag"]
+    not_modified = test_client.get(
+        events_url, params={"limit": 2}, headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert not_modified.headers["etag"] == etag
+
+    test_db_client.query.return_value = []
+    response = test_client.get(
+        events_url, params={"limit": 2}, headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["events"] == []
+
+
+def test_get_events_page_by_schedule(test_db_client, test_client, events_url):
+    event = gen_event()
+    event_dict = event.model_dump() | {"schedule": None}
+    after = encode_cursor("schedule", None, event.id)
+
+    test_db_client.query.return_value = [
+        get_events_page_by_schedule_qry.GetEventsPageByScheduleResult(**event_dict)
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(
+        events_url,
+        params={
+            "order_by": "schedule",
+            "after": after,
+            "schedule_to": "2010-12-27T23:59:59-07:00",
+        },
+    )
+    resp_json = response.json()
+    _, kwargs = test_db_client.query.call_args
+
+    assert response.status_code == HTTPStatus.OK
+    assert kwargs["after_schedule"] is None
+    assert str(kwargs["after_id"]) == event.id
+    assert_datetime_equal(kwargs["schedule_to"], "2010-12-27T23:59:59-07:00")
+    assert resp_json["events"][0]["name"] == event_dict["name"]
+    assert resp_json["events"][0]["schedule"] is None
+    assert resp_json["next_cursor"] is None
+
+
+def test_get_events_by_keys(test_db_client, test_client, events_url):
+    event1, event2 = gen_event(), gen_event()
+
+    test_db_client.query.return_value = [
+        get_events_by_keys_qry.GetEventsByKeysResult(**event1.model_dump())
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(
+        events_url, params={"names": f"{event1.name},{event2.name}"}
+    )
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert [event["name"] for event in resp_json["events"]] == [event1.name]
+    assert resp_json["missing"] == [event2.name]
+    assert test_db_client.query.call_args.kwargs["ids"] == []
+
+
 def test_post_event1(test_db_client, test_client, events_url):
     event = gen_event()
     event_dict = event.model_dump(
@@ -161,6 +300,96 @@ def test_post_event4(test_db_client, test_client, events_url):
     assert resp_json["host_name"] == event_dict["host_name"]
 
 
+def _mock_transaction(test_db_client, *results):
+    tx = MagicMock()
+    tx.query = AsyncMock(side_effect=results)
+
+    async def transaction():
+        yield tx
+
+    test_db_client.transaction.side_effect = transaction
+    return tx
+
+
+def test_post_events_bulk(test_db_client, test_client, events_url):
+    event1, event2 = gen_event(), gen_event()
+
+    tx = _mock_transaction(
+        test_db_client,
+        [],
+        [
+            bulk_create_events_qry.BulkCreateEventsResult(
+                **event1.model_dump(include={"id", "name"})
+            )
+        ],
+    )
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    fields = {"name", "address", "schedule", "host_name"}
+    response = test_client.post(
+        f"{events_url}/bulk",
+        json=[
+            event1.model_dump(include=fields),
+            event2.model_dump(include=fields),
+            event1.model_dump(include=fields),
+            {"name": "naive", "host_name": "x", "schedule": "2010-12-27T23:59:59"},
+            {"name": "no host"},
+        ],
+    )
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert (resp_json["created"], resp_json["duplicate"], resp_json["invalid"]) == (
+        1,
+        2,
+        2,
+    )
+    assert [item["status"] for item in resp_json["items"]] == [
+        "created",
+        "duplicate",
+        "duplicate",
+        "invalid",
+        "invalid",
+    ]
+    assert "Invalid datetime format" in resp_json["items"][3]["error"]
+    assert tx.query.call_count == 2
+    payload = json.loads(tx.query.call_args.kwargs["events"])
+    assert [event["name"] for event in payload] == [event1.name, event2.name]
+
+
+def test_post_events_bulk_ndjson(test_db_client, test_client, events_url, mocker):
+    events = [gen_event() for _ in range(3)]
+
+    created_events = [
+        bulk_create_events_qry.BulkCreateEventsResult(
+            **event.model_dump(include={"id", "name"})
+        )
+        for event in events
+    ]
+    tx = _mock_transaction(
+        test_db_client, [], created_events[:2], [], created_events[2:]
+    )
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+    mocker.patch.object(settings, "backend_bulk_chunk_size", 2)
+
+    fields = {"name", "address", "schedule", "host_name"}
+    response = test_client.post(
+        f"{events_url}/bulk",
+        content="\n".join(event.model_dump_json(include=fields) for event in events),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert [(line["index"], line["status"]) for line in lines] == [
+        (0, "created"),
+        (1, "created"),
+        (2, "created"),
+    ]
+    assert test_db_client.transaction.call_count == 2
+    assert tx.query.call_count == 4
+
+
 def test_put_event(test_db_client, test_client, events_url):
     event = gen_event()
     e_name_old, e_name_new = event.name, f"{event.name}_new"
@@ -169,7 +398,7 @@ def test_put_event(test_db_client, test_client, events_url):
     ) | {"name": e_name_new}
 
     test_db_client.query_single.return_value = update_event_qry.UpdateEventResult(
-        **event_dict
+        **event_dict, orig_host_name=event.host_name
     )
     t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
 
@@ -189,6 +418,35 @@ def test_put_event(test_db_client, test_client, events_url):
     assert resp_json["address"] == event_dict["address"]
     assert resp_json["schedule"] == event_dict["schedule"]
     assert resp_json["host_name"] == event_dict["host_name"]
+    assert "orig_host_name" not in resp_json
+    assert test_db_client.query_single.await_count == 1
+
+
+def test_put_event_keeps_host(test_db_client, test_client, events_url):
+    event = gen_event()
+    event_dict = event.model_dump(include={"id", "name", "address", "schedule"})
+
+    test_db_client.query_single.return_value = update_event_qry.UpdateEventResult(
+        **event_dict, host_name=event.host_name, orig_host_name=event.host_name
+    )
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.put(
+        events_url,
+        json={
+            "name": event.name,
+            "new_name": None,
+            "address": None,
+            "schedule": None,
+            "host_name": None,
+        },
+    )
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert resp_json["host_name"] == event.host_name
+    # Sent as unset, so the query falls back on the original host.
+    assert test_db_client.query_single.call_args.kwargs["host_name"] is None
 
 
 def test_delete_event(test_db_client, test_client, events_url):
@@ -236,6 +494,59 @@ def test_get_event_not_found(test_db_client, test_client, events_url, log_output
     assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
 
 
+def test_get_events_page_cursor_order_mismatch(
+    test_db_client, test_client, events_url, log_output
+):
+    after = encode_cursor("name", "Event name")
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(
+        events_url, params={"order_by": "created_at", "after": after}
+    )
+    resp_json = response.json()
+    err_msg = f"Invalid cursor '{after}'."
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+    test_db_client.query.assert_not_called()
+
+
+@pytest.mark.parametrize("order_by", ["created_at", "schedule"])
+def test_get_events_page_naive_cursor(
+    order_by, test_db_client, test_client, events_url, log_output
+):
+    after = encode_cursor(order_by, "2010-12-27T23:59:59", uuid.uuid4())
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(
+        events_url, params={"order_by": order_by, "after": after}
+    )
+    resp_json = response.json()
+    err_msg = f"Invalid cursor '{after}'."
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+    test_db_client.query.assert_not_called()
+
+
+def test_get_events_page_naive_datetime(
+    test_db_client, test_client, events_url, log_output
+):
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(
+        events_url, params={"schedule_from": "2010-12-27T23:59:59"}
+    )
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "Invalid datetime format" in resp_json["detail"]["error"]
+    assert log_output.entries[0]["log_level"] == "warning"
+    test_db_client.query.assert_not_called()
+
+
 def test_post_event_bad_request1(test_db_client, test_client, events_url, log_output):
     event = gen_event()
 
@@ -0,0 +1,150 @@
+from http import HTTPStatus
+
+import pytest
+from edgedb.asyncio_client import AsyncIOClient
+
+from app import metrics
+from app.existence import UserNameFilter
+from app.queries import create_event_async_edgeql as create_event_qry
+from app.queries import create_user_async_edgeql as create_user_qry
+
+from .factories import TestUserData, gen_event
+from .lifespan import t_lifespan
+
+
+################################
+# Fixtures
+################################
+@pytest.fixture(scope="function")
+def name_filters(test_services):
+    """The app's filters, enabled but not built yet."""
+    test_services.user_filter.enabled = True
+    test_services.event_filter.enabled = True
+    return test_services.user_filter, test_services.event_filter
+
+
+################################
+# Good cases
+################################
+def test_name_filter_no_false_negatives():
+    names = [f"user{i}" for i in range(1000)]
+    name_filter = UserNameFilter(capacity=1000)
+    name_filter.build(names)
+
+    assert all(name_filter.might_contain(name) for name in names)
+
+
+def test_name_filter_false_positive_rate():
+    name_filter = UserNameFilter(capacity=1000, error_rate=0.01)
+    name_filter.build(f"user{i}" for i in range(1000))
+    absent = metrics.name_filter_checks_total.get("users", "absent")
+
+    false_positives = sum(name_filter.might_contain(f"other{i}") for i in range(10_000))
+
+    assert false_positives < 300
+    assert (
+        metrics.name_filter_checks_total.get("users", "absent")
+        == absent + 10_000 - false_positives
+    )
+
+
+def test_name_filter_maybe_until_built_or_over_capacity():
+    name_filter = UserNameFilter(capacity=2)
+    assert name_filter.might_contain("anyone")
+
+    name_filter.build(["a", "b"])
+    assert not name_filter.might_contain("anyone")
+
+    name_filter.add("c")
+    assert name_filter.might_contain("anyone")
+
+
+def test_name_filter_counts_distinct_names():
+    name_filter = UserNameFilter(capacity=3)
+    name_filter.build(["a", "b", "c"])
+    for _ in range(4):
+        name_filter.add("a")
+
+    assert name_filter.n_names == 3
+    assert not name_filter.might_contain("anyone")
+
+
+def test_name_filter_disabled():
+    name_filter = UserNameFilter(capacity=3, enabled=False)
+    name_filter.build(["a"])
+    name_filter.add("b")
+
+    assert name_filter.n_names == 0
+    assert not any(name_filter._bits)
+    assert name_filter.might_contain("anyone")
+
+
+def test_get_user_skipped_when_absent(
+    test_db_client, test_client, users_url, name_filters, log_output
+):
+    user_filter, _ = name_filters
+    user_filter.build(["known"])
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url, params={"name": "unknown"})
+    err_msg = "Username 'unknown' does not exist."
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+    test_db_client.query_single.assert_not_awaited()
+
+
+def test_post_user_adds_name(test_db_client, test_client, users_url, name_filters):
+    user = TestUserData()
+    user_filter, _ = name_filters
+    user_filter.build([])
+
+    test_db_client.query_single.return_value = create_user_qry.CreateUserResult(
+        **user.model_dump()
+    )
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.post(users_url, json={"name": user.name})
+    assert response.status_code == HTTPStatus.CREATED
+
+    test_db_client.query_single.return_value = None
+    response = test_client.get(users_url, params={"name": user.name})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert test_db_client.query_single.await_count == 2
+
+
+def test_get_event_skipped_when_absent(
+    test_db_client, test_client, events_url, name_filters
+):
+    _, event_filter = name_filters
+    event_filter.build(["known"])
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(events_url, params={"name": "unknown"})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"]["error"] == "Event 'unknown' does not exist."
+    test_db_client.query_single.assert_not_awaited()
+
+
+def test_post_event_adds_names(test_db_client, test_client, events_url, name_filters):
+    event = gen_event()
+    user_filter, event_filter = name_filters
+    user_filter.build([])
+    event_filter.build([])
+
+    test_db_client.query_single.return_value = create_event_qry.CreateEventResult(
+        **event.model_dump(include={"id", "name", "address", "schedule", "host_name"})
+    )
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.post(
+        events_url,
+        json=event.model_dump(include={"name", "address", "schedule", "host_name"}),
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert event_filter.might_contain(event.name)
+    assert user_filter.might_contain(event.host_name)
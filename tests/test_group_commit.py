@@ -0,0 +1,176 @@
+import asyncio
+from http import HTTPStatus
+
+import edgedb
+import pytest
+from edgedb.asyncio_client import AsyncIOClient
+
+from app import metrics
+from app.config import settings
+from app.group_commit import UserInsertBatcher
+from app.metrics import InstrumentedExecutor, RequestDBTime
+from app.queries import bulk_create_users_async_edgeql as bulk_create_users_qry
+from app.queries import create_user_async_edgeql as create_user_qry
+
+from .factories import TestUserData
+from .lifespan import t_lifespan
+
+
+def _created(*users):
+    return [
+        bulk_create_users_qry.BulkCreateUsersResult(
+            **user.model_dump(include={"id", "name", "created_at"})
+        )
+        for user in users
+    ]
+
+
+################################
+# Good cases
+################################
+@pytest.mark.asyncio
+async def test_group_commit(test_db_client):
+    user1, user2 = TestUserData(), TestUserData()
+    batcher = UserInsertBatcher(window=0.01, max_size=10)
+    test_db_client.query.return_value = _created(user1, user2)
+
+    results = await asyncio.gather(
+        batcher.create_user(test_db_client, name=user1.name),
+        batcher.create_user(test_db_client, name=user2.name),
+        batcher.create_user(test_db_client, name=user1.name),
+        batcher.create_user(test_db_client, name="taken"),
+        return_exceptions=True,
+    )
+
+    assert test_db_client.query.await_count == 1
+    assert test_db_client.query.call_args.kwargs["names"] == [
+        user1.name,
+        user2.name,
+        "taken",
+    ]
+    assert results[0] == create_user_qry.CreateUserResult(
+        **user1.model_dump(include={"id", "name", "created_at"})
+    )
+    assert results[1].name == user2.name
+    assert isinstance(results[2], edgedb.errors.ConstraintViolationError)
+    assert isinstance(results[3], edgedb.errors.ConstraintViolationError)
+
+
+@pytest.mark.asyncio
+async def test_group_commit_max_size(test_db_client):
+    user1, user2, user3 = TestUserData(), TestUserData(), TestUserData()
+    # The window is never reached, full batches are sent right away.
+    batcher = UserInsertBatcher(window=60, max_size=2)
+    test_db_client.query.side_effect = [_created(user1, user2), _created(user3)]
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            batcher.create_user(test_db_client, name=user1.name),
+            batcher.create_user(test_db_client, name=user2.name),
+            asyncio.sleep(0.01),
+        ),
+        timeout=1,
+    )
+    assert [result.name for result in results[:2]] == [user1.name, user2.name]
+
+    pending = asyncio.ensure_future(
+        batcher.create_user(test_db_client, name=user3.name)
+    )
+    await asyncio.sleep(0)
+    await batcher.aclose()
+
+    assert (await pending).name == user3.name
+    assert test_db_client.query.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_group_commit_db_time(test_db_client):
+    user1, user2 = TestUserData(), TestUserData()
+    batcher = UserInsertBatcher(window=0.01, max_size=10)
+    executor = InstrumentedExecutor(test_db_client)
+    test_db_client.query.return_value = _created(user1)
+
+    async def create_user(name):
+        db_time = RequestDBTime()
+        metrics.request_db_time.set(db_time)
+        await asyncio.gather(
+            batcher.create_user(executor, name=name), return_exceptions=True
+        )
+        return db_time
+
+    first, second = await asyncio.gather(
+        create_user(user1.name), create_user(user2.name)
+    )
+
+    # Both waited for the statement, whether their user was created or not.
+    assert first.n_queries == second.n_queries == 1
+    assert first.duration == second.duration > 0
+
+
+@pytest.mark.asyncio
+async def test_group_commit_after_close(test_db_client):
+    user = TestUserData()
+    batcher = UserInsertBatcher(window=60, max_size=10)
+    test_db_client.query_single.return_value = create_user_qry.CreateUserResult(
+        **user.model_dump(include={"id", "name", "created_at"})
+    )
+
+    await batcher.aclose()
+    created_user = await asyncio.wait_for(
+        batcher.create_user(test_db_client, name=user.name), timeout=1
+    )
+
+    assert created_user.name == user.name
+    test_db_client.query_single.assert_awaited_once()
+    test_db_client.query.assert_not_awaited()
+
+
+def test_post_user_group_commit(mocker, test_db_client, test_client, users_url):
+    user = TestUserData()
+    mocker.patch.object(settings, "backend_group_commit", True)
+    test_db_client.query.return_value = _created(user)
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.post(users_url, json={"name": user.name})
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert resp_json["id"] == str(user.id)
+    assert resp_json["name"] == user.name
+    test_db_client.query_single.assert_not_awaited()
+
+
+################################
+# Bad cases
+################################
+@pytest.mark.asyncio
+async def test_group_commit_error(test_db_client):
+    batcher = UserInsertBatcher(window=0.01, max_size=10)
+    test_db_client.query.side_effect = edgedb.errors.InternalServerError
+
+    results = await asyncio.gather(
+        batcher.create_user(test_db_client, name="a"),
+        batcher.create_user(test_db_client, name="b"),
+        return_exceptions=True,
+    )
+
+    assert test_db_client.query.await_count == 1
+    assert all(
+        isinstance(result, edgedb.errors.InternalServerError) for result in results
+    )
+
+
+def test_post_user_group_commit_bad_request(
+    mocker, test_db_client, test_client, users_url, log_output
+):
+    user = TestUserData()
+    mocker.patch.object(settings, "backend_group_commit", True)
+    test_db_client.query.return_value = []
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.post(users_url, json={"name": user.name})
+    err_msg = f"Username '{user.name}' already exists."
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
@@ -1,4 +1,24 @@
+import asyncio
+import time
 from http import HTTPStatus
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from edgedb.asyncio_client import AsyncIOClient
+from svcs.exceptions import ServiceNotFoundError
+
+from app.config import settings
+from app.health import HealthCheckCache, HealthResult, _check_healthy
+from app.lifespan import ping_db_callable
+from app.queries import ping_db_async_edgeql as ping_db_qry
+
+from .lifespan import t_lifespan
+
+
+def _service_ping(name, aping):
+    svc = Mock(aping=aping)
+    svc.name = name
+    return svc
 
 
 ################################
@@ -7,7 +27,9 @@ from http import HTTPStatus
 def test_healthy(mocker, test_client, health_url):
     mocker.patch(
         "app.health._check_healthy",
-        return_value=(["edgedb.asyncio_client.AsyncIOClient", "service_name_n"], []),
+        return_value=HealthResult(
+            ok=["edgedb.asyncio_client.AsyncIOClient", "service_name_n"], failing=[]
+        ),
     )
 
     response = test_client.get(health_url)
@@ -19,15 +41,131 @@ def test_healthy(mocker, test_client, health_url):
     assert "service_name_n" in resp_json_ok
 
 
+def test_livez(mocker, test_client):
+    check_healthy = mocker.patch("app.health._check_healthy")
+
+    response = test_client.get("/livez")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["ok"] == ["app"]
+    check_healthy.assert_not_called()
+
+
+def test_readyz_cached(mocker, test_client):
+    check_healthy = mocker.patch(
+        "app.health._check_healthy",
+        return_value=HealthResult(
+            ok=["edgedb.asyncio_client.AsyncIOClient"], failing=[]
+        ),
+    )
+
+    responses = [test_client.get("/readyz") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [HTTPStatus.OK] * 3
+    assert responses[0].json()["ok"] == ["edgedb.asyncio_client.AsyncIOClient"]
+    check_healthy.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_check_healthy_concurrent_with_timeout(mocker):
+    mocker.patch.object(settings, "backend_health_timeout", 0.2)
+
+    async def slow_aping():
+        await asyncio.sleep(0.1)
+
+    async def hung_aping():
+        await asyncio.sleep(10)
+
+    services = Mock(aget=AsyncMock(side_effect=ServiceNotFoundError))
+    services.get_pings.return_value = [
+        _service_ping("slow_1", slow_aping),
+        _service_ping("slow_2", slow_aping),
+        _service_ping("hung", hung_aping),
+    ]
+
+    start = time.perf_counter()
+    health = await _check_healthy(services)
+
+    assert time.perf_counter() - start < 0.5
+    assert health.ok == ["slow_1", "slow_2"]
+    assert list(health.failing[0]) == ["hung"]
+    assert "TimeoutError" in health.failing[0]["hung"]
+    assert health.latency_ms["slow_1"] >= 100
+    assert health.latency_ms["hung"] >= 200
+    assert health.pool is None
+
+
+def test_healthy_latency_and_pool(mocker, test_db_client, test_client, health_url):
+    test_db_client.query_single.return_value = 1
+    test_db_client.max_concurrency = 10
+    test_db_client.free_size = 9
+    ping_db = mocker.spy(ping_db_qry, "ping_db")
+
+    async def create_db_client():
+        yield test_db_client
+
+    t_lifespan.registry.register_factory(
+        AsyncIOClient, create_db_client, ping=ping_db_callable
+    )
+
+    response = test_client.get(health_url)
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert resp_json["ok"] == ["edgedb.asyncio_client.AsyncIOClient"]
+    assert resp_json["status"] == "ok"
+    assert resp_json["latency_ms"]["edgedb.asyncio_client.AsyncIOClient"] >= 0
+    assert resp_json["pool"] == {"max_concurrency": 10, "in_use": 1, "free": 9}
+    ping_db.assert_awaited_once_with(test_db_client)
+    test_db_client.query_single.assert_awaited_once()
+
+
+def test_healthy_degraded(mocker, test_client, health_url):
+    mocker.patch.object(settings, "backend_health_degraded_ms", 50)
+    mocker.patch(
+        "app.health._check_healthy",
+        return_value=HealthResult(ok=["svc"], failing=[], latency_ms={"svc": 80}),
+    )
+
+    healthy_response = test_client.get(health_url)
+    ready_response = test_client.get("/readyz")
+
+    assert healthy_response.status_code == HTTPStatus.OK
+    assert healthy_response.json()["status"] == "degraded"
+    assert ready_response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert "Degraded" in ready_response.json()["detail"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_health_check_cache():
+    now = 0.0
+    cache = HealthCheckCache(ttl=1, clock=lambda: now)
+    n_checks = 0
+
+    async def check():
+        nonlocal n_checks
+        n_checks += 1
+        await asyncio.sleep(0)
+        return HealthResult(ok=["svc"], failing=[])
+
+    results = await asyncio.gather(*(cache.get_or_check(check) for _ in range(5)))
+    assert results == [HealthResult(ok=["svc"], failing=[])] * 5
+    assert n_checks == 1
+
+    now = 1.0
+    await cache.get_or_check(check)
+    assert n_checks == 2
+
+
 ################################
 # Bad case
 ################################
 def test_not_healthy(mocker, test_client, health_url):
     mocker.patch(
         "app.health._check_healthy",
-        return_value=(
-            [],
-            [
+        return_value=HealthResult(
+            ok=[],
+            failing=[
                 {
                     "service_name_1": "Exceptions for service_name_1",
                     "service_name_2": "Exceptions for service_name_2",
@@ -46,3 +184,18 @@ def test_not_healthy(mocker, test_client, health_url):
     assert "Exceptions for service_name_1" in resp_json_detail_error
     assert "service_name_2" in resp_json_detail_error
     assert "Exceptions for service_name_2" in resp_json_detail_error
+
+
+def test_readyz_not_ready(mocker, test_client):
+    mocker.patch(
+        "app.health._check_healthy",
+        return_value=HealthResult(
+            ok=[], failing=[{"service_name_1": "TimeoutError('No answer')"}]
+        ),
+    )
+
+    response = test_client.get("/readyz")
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert "Readiness check failed" in response.json()["detail"]["error"]
+    assert "service_name_1" in response.json()["detail"]["error"]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from edgedb.asyncio_client import AsyncIOClient
+
+from app import metrics
+from app.limits import RouteLimiter
+from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+
+from .factories import TestUserDataWithnEvents
+from .lifespan import t_lifespan
+
+
+################################
+# Good cases
+################################
+@pytest.mark.asyncio
+async def test_route_limiter():
+    limiter = RouteLimiter({"heavy": 1, "off": 0})
+    count = metrics.route_limit_wait_seconds.count("heavy")
+    order = []
+
+    async def run(name, budget):
+        async with limiter.acquire(budget):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    await asyncio.gather(run("a", "heavy"), run("b", "heavy"), run("c", "off"))
+
+    assert order.index("a end") < order.index("b start")
+    assert order.index("c start") < order.index("a end")
+    assert metrics.route_limit_wait_seconds.count("heavy") == count + 2
+    assert metrics.route_limit_waiting.get("heavy") == 0
+
+
+def test_full_list_only_is_limited(test_db_client, test_client, users_url):
+    user = TestUserDataWithnEvents()
+    test_db_client.query.return_value = []
+    test_db_client.query_single.return_value = get_user_by_name_qry.GetUserByNameResult(
+        **user.model_dump()
+    )
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+    count = metrics.route_limit_wait_seconds.count("users_list")
+
+    test_client.get(users_url, params={"name": user.name})
+    assert metrics.route_limit_wait_seconds.count("users_list") == count
+
+    test_client.get(users_url)
+    assert metrics.route_limit_wait_seconds.count("users_list") == count + 1
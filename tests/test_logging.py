@@ -0,0 +1,54 @@
+import io
+import logging
+import queue
+
+from app.logging import BatchLogWriter, BoundedQueueHandler, LogOverflowPolicy
+
+
+def _make_logger(handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"test_logging.{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+
+################################
+# Good cases
+################################
+def test_queue_logging_batches():
+    log_queue, stream = queue.Queue(maxsize=100), io.StringIO()
+    handler = BoundedQueueHandler(log_queue, overflow=LogOverflowPolicy.DROP)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger = _make_logger(handler)
+
+    for i in range(5):
+        logger.info("line %d", i)
+    writer = BatchLogWriter(log_queue, stream, batch_size=2, handler=handler)
+    writer.start()
+    log_queue.join()
+    log_queue.put(None)
+    writer.join()
+
+    assert stream.getvalue().splitlines() == [f"INFO line {i}" for i in range(5)]
+
+
+def test_queue_logging_drops_when_full():
+    log_queue, stream = queue.Queue(maxsize=2), io.StringIO()
+    handler = BoundedQueueHandler(log_queue, overflow=LogOverflowPolicy.DROP)
+    logger = _make_logger(handler)
+
+    for i in range(5):
+        logger.info("line %d", i)
+    writer = BatchLogWriter(log_queue, stream, batch_size=10, handler=handler)
+    writer.start()
+    log_queue.join()
+    log_queue.put(None)
+    writer.join()
+
+    assert handler.dropped == 3
+    assert stream.getvalue().splitlines() == [
+        "line 0",
+        "line 1",
+        "Dropped 3 log records, the log queue was full.",
+    ]
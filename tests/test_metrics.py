@@ -0,0 +1,170 @@
+from http import HTTPStatus
+from unittest.mock import MagicMock
+
+import pytest
+from edgedb.asyncio_client import AsyncIOClient
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.cache import QueryCache
+from app.metrics import (
+    Counter,
+    Histogram,
+    InstrumentedExecutor,
+    MetricsRegistry,
+    RequestDBTime,
+)
+from app.middlewares import LoggingMiddleware
+from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from app.queries import get_users_async_edgeql as get_users_qry
+
+from .lifespan import t_lifespan
+
+
+################################
+# Good cases
+################################
+def test_registry_render():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests.", ("route",)))
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    )
+
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/a\\"b"} 3\n'
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 2\n'
+        'latency_seconds_bucket{le="1"} 3\n'
+        'latency_seconds_bucket{le="+Inf"} 4\n'
+        "latency_seconds_sum 3.65\n"
+        "latency_seconds_count 4\n"
+    )
+    assert histogram.count() == 4
+
+
+@pytest.mark.asyncio
+async def test_instrumented_executor(test_db_client):
+    test_db_client.query_single.return_value = None
+    executor = InstrumentedExecutor(test_db_client)
+    count = metrics.db_query_duration_seconds.count("get_user_by_name")
+    errors = metrics.db_query_errors_total.get("get_user_by_name")
+
+    await get_user_by_name_qry.get_user_by_name(executor, name="a")
+    test_db_client.query_single.side_effect = RuntimeError
+    with pytest.raises(RuntimeError):
+        await get_user_by_name_qry.get_user_by_name(executor, name="a")
+
+    assert metrics.db_query_duration_seconds.count("get_user_by_name") == count + 2
+    assert metrics.db_query_errors_total.get("get_user_by_name") == errors + 1
+
+
+@pytest.mark.asyncio
+async def test_query_label_through_wrappers(test_db_client):
+    test_db_client.query_single.return_value = None
+    executor = InstrumentedExecutor(test_db_client)
+    cache = QueryCache(max_size=10, ttl=10)
+    count = metrics.db_query_duration_seconds.count("get_user_by_name")
+    inline = metrics.db_query_duration_seconds.count("<inline>")
+
+    # Run in the task of the cache's single-flight.
+    await cache.fetch(get_user_by_name_qry.get_user_by_name, executor, name="a")
+    await executor.query_single("select 1")
+
+    assert metrics.db_query_duration_seconds.count("get_user_by_name") == count + 1
+    assert metrics.db_query_duration_seconds.count("<inline>") == inline + 1
+
+
+@pytest.mark.asyncio
+async def test_instrumented_executor_rows_and_slow_queries(test_db_client, log_output):
+    test_db_client.query.return_value = [MagicMock(), MagicMock()]
+    executor = InstrumentedExecutor(test_db_client, slow_ms=0)
+    rows = metrics.db_query_rows_total.get("get_users")
+    db_time = RequestDBTime()
+    token = metrics.request_db_time.set(db_time)
+    try:
+        await get_users_qry.get_users(executor)
+        await get_users_qry.get_users(executor)
+    finally:
+        metrics.request_db_time.reset(token)
+
+    assert metrics.db_query_rows_total.get("get_users") == rows + 4
+    assert db_time.n_queries == 2
+    assert db_time.duration > 0
+    assert log_output.entries[-1]["event"] == "Slow query get_users"
+    assert log_output.entries[-1]["rows"] == 2
+    assert log_output.entries[-1]["log_level"] == "warning"
+
+
+@pytest.mark.asyncio
+async def test_instrumented_executor_transaction(test_db_client):
+    test_db_client.query.return_value = []
+    tx = MagicMock()
+    tx.__aenter__.return_value = tx
+    tx.query = test_db_client.query
+
+    async def transaction():
+        yield tx
+
+    executor = InstrumentedExecutor(MagicMock(transaction=transaction))
+    count = metrics.db_query_duration_seconds.count("get_users")
+
+    async for instrumented_tx in executor.transaction():
+        async with instrumented_tx:
+            await get_users_qry.get_users(instrumented_tx)
+
+    assert metrics.db_query_duration_seconds.count("get_users") == count + 1
+    tx.__aexit__.assert_awaited_once()
+
+
+def test_access_log_db_ms(test_db_client, log_output):
+    test_db_client.query.return_value = []
+    executor = InstrumentedExecutor(test_db_client)
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/users")
+    async def get_users():
+        await get_users_qry.get_users(executor)
+        await get_users_qry.get_users(executor)
+        return []
+
+    with TestClient(app) as client:
+        client.get("/users")
+
+    access_log = log_output.entries[-1]
+
+    assert access_log["db_queries"] == 2
+    assert 0 <= access_log["db_ms"] <= access_log["duration"] / 10**6
+
+
+def test_get_metrics(test_db_client, test_client, users_url):
+    test_db_client.query.return_value = []
+    test_db_client.max_concurrency = 10
+    test_db_client.free_size = 7
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+    labels = ("GET", users_url, HTTPStatus.OK)
+    total = metrics.http_requests_total.get(*labels)
+
+    test_client.get(users_url)
+    response = test_client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert metrics.http_requests_total.get(*labels) == total + 1
+    assert (
+        'http_requests_total{method="GET",route="/users",status="200"}' in response.text
+    )
+    assert "edgedb_pool_max_concurrency 10\n" in response.text
+    assert "edgedb_pool_in_use 3\n" in response.text
+    # The scrape itself is in flight.
+    assert "http_requests_in_flight 1\n" in response.text
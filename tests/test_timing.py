@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import httpx
+import pytest
+from edgedb.asyncio_client import AsyncIOClient
+
+from app.metrics import InstrumentedExecutor
+from app.timing import ServerTiming
+from fastui_app import timing as frontend_timing
+from fastui_app.clients import BackendAsyncClient
+
+from .lifespan import t_lifespan
+
+
+def _parse_server_timing(header: str) -> dict[str, str]:
+    return dict(metric.strip().split(";", 1) for metric in header.split(","))
+
+
+################################
+# Good cases
+################################
+def test_server_timing_header():
+    timing = ServerTiming()
+    timing.add("db-get_users", 0.001)
+    timing.add("db-get_users", 0.002)
+    timing.add("db-<inline>", 0.0005)
+    timing._close_route(1.0, 1.004)
+
+    assert timing.header(0.005) == (
+        'db-get_users;dur=3.000;desc="2 calls", '
+        "db-_inline_;dur=0.500, "
+        "parse;dur=4.000, "
+        "middleware;dur=1.000, "
+        "total;dur=5.000"
+    )
+
+
+def test_server_timing_phases(test_db_client, test_client, users_url):
+    test_db_client.query.return_value = []
+    t_lifespan.registry.register_value(
+        AsyncIOClient, InstrumentedExecutor(test_db_client)
+    )
+
+    response = test_client.get(users_url)
+    metrics = _parse_server_timing(response.headers["Server-Timing"])
+
+    assert response.status_code == HTTPStatus.OK
+    assert list(metrics) == [
+        "wait-users_list",
+        "db-get_users",
+        "parse",
+        "endpoint",
+        "serialize",
+        "middleware",
+        "total",
+    ]
+    durations = {
+        name: float(metric.removeprefix("dur=")) for name, metric in metrics.items()
+    }
+    assert durations["db-get_users"] <= durations["endpoint"] <= durations["total"]
+
+
+def test_server_timing_validation_error(test_client, users_url):
+    response = test_client.get(users_url, params={"limit": "x"})
+    metrics = _parse_server_timing(response.headers["Server-Timing"])
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert list(metrics) == ["parse", "middleware", "total"]
+
+
+@pytest.mark.asyncio
+async def test_backend_client_wait_time():
+    transport = httpx.MockTransport(lambda request: httpx.Response(HTTPStatus.OK))
+    timing = frontend_timing.ServerTiming()
+    token = frontend_timing.server_timing.set(timing)
+    try:
+        async with BackendAsyncClient(
+            base_url="http://backend", transport=transport
+        ) as client:
+            await client.get("/users")
+            await client.post("/users", json={})
+    finally:
+        frontend_timing.server_timing.reset(token)
+
+    assert timing.header(1).startswith("backend;dur=")
+    assert 'desc="2 calls"' in timing.header(1)
@@ -1,13 +1,20 @@
+import json
+import uuid
 from http import HTTPStatus
 
 import edgedb
 import pytest
 from edgedb.asyncio_client import AsyncIOClient
 
+from app.config import settings
+from app.pagination import decode_cursor, encode_cursor
+from app.queries import bulk_create_users_async_edgeql as bulk_create_users_qry
 from app.queries import create_user_async_edgeql as create_user_qry
 from app.queries import delete_user_async_edgeql as delete_user_qry
 from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
 from app.queries import get_users_async_edgeql as get_users_qry
+from app.queries import get_users_by_keys_async_edgeql as get_users_by_keys_qry
+from app.queries import get_users_page_async_edgeql as get_users_page_qry
 from app.queries import update_user_async_edgeql as update_users_qry
 
 from .factories import TestUserData, TestUserDataWithnEvents
@@ -72,6 +79,149 @@ def test_get_users(gen_user_with_n_event, test_db_client, test_client, users_url
     assert_datetime_equal(second_user["created_at"], user_dict2["created_at"])
 
 
+def test_get_users_etag(gen_user_with_n_event, test_db_client, test_client, users_url):
+    user = gen_user_with_n_event()
+
+    test_db_client.query.return_value = [
+        get_users_qry.GetUsersResult(**user.model_dump())
+    ]
+    test_db_client.query_single.return_value = get_user_by_name_qry.GetUserByNameResult(
+        **user.model_dump()
+    )
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url)
+    etag = response.headers["etag"]
+    not_modified = test_client.get(
+        users_url, headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+    assert test_db_client.query.call_count == 1
+
+    response = test_client.get(
+        users_url, params={"name": user.name}, headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["etag"] != etag
+
+
+def test_get_users_page(gen_user_with_n_event, test_db_client, test_client, users_url):
+    users = [gen_user_with_n_event() for _ in range(3)]
+    user_dicts = [user.model_dump() for user in users]
+
+    test_db_client.query.return_value = [
+        get_users_page_qry.GetUsersPageResult(**user_dict) for user_dict in user_dicts
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url, params={"limit": 2})
+    resp_json = response.json()
+    _, kwargs = test_db_client.query.call_args
+
+    assert response.status_code == HTTPStatus.OK
+    assert kwargs["limit"] == 3
+    assert kwargs["after_created_at"] is None
+    assert kwargs["after_id"] is None
+    assert [user["id"] for user in resp_json["users"]] == [
+        user_dict["id"] for user_dict in user_dicts[:2]
+    ]
+    created_at, user_id = decode_cursor(resp_json["next_cursor"], str, str)
+    assert_datetime_equal(created_at, user_dicts[1]["created_at"])
+    assert user_id == user_dicts[1]["id"]
+
+
+def test_get_users_last_page(
+    gen_user_with_n_event, test_db_client, test_client, users_url
+):
+    user = gen_user_with_n_event()
+    user_dict = user.model_dump()
+    after = encode_cursor(user.created_at, user.id)
+
+    test_db_client.query.return_value = [
+        get_users_page_qry.GetUsersPageResult(**user_dict)
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url, params={"limit": 2, "after": after})
+    resp_json = response.json()
+    _, kwargs = test_db_client.query.call_args
+
+    assert response.status_code == HTTPStatus.OK
+    assert kwargs["after_created_at"] == user.created_at
+    assert str(kwargs["after_id"]) == user.id
+    assert len(resp_json["users"]) == 1
+    assert resp_json["next_cursor"] is None
+
+
+def test_get_users_json_passthrough(
+    mocker, gen_user_with_n_event, test_db_client, test_client, users_url
+):
+    mocker.patch.object(settings, "backend_json_passthrough", True)
+    user_dicts = [gen_user_with_n_event().model_dump(mode="json") for _ in range(2)]
+
+    test_db_client.query_json.return_value = json.dumps(user_dicts)
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == user_dicts
+    test_db_client.query.assert_not_called()
+
+
+def test_get_user_json_passthrough(
+    mocker, gen_user_with_n_event, test_db_client, test_client, users_url
+):
+    mocker.patch.object(settings, "backend_json_passthrough", True)
+    user = gen_user_with_n_event()
+    user_dict = user.model_dump(mode="json")
+
+    test_db_client.query_single_json.return_value = json.dumps(user_dict)
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url, params={"name": user.name})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == user_dict
+    test_db_client.query_single.assert_not_called()
+
+
+def test_get_users_by_keys(
+    gen_user_with_n_event, test_db_client, test_client, users_url
+):
+    user1, user2, user3 = (gen_user_with_n_event() for _ in range(3))
+
+    test_db_client.query.return_value = [
+        get_users_by_keys_qry.GetUsersByKeysResult(
+            **user.model_dump() | {"id": uuid.UUID(user.id)}
+        )
+        for user in (user1, user2)
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    response = test_client.get(
+        users_url,
+        params={
+            "names": f"{user2.name},missing, {user2.name}",
+            "ids": f"{user1.id},{missing_id}",
+        },
+    )
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert [user["name"] for user in resp_json["users"]] == [user2.name, user1.name]
+    assert resp_json["missing"] == ["missing", missing_id]
+    assert test_db_client.query.call_count == 1
+    assert test_db_client.query.call_args.kwargs["names"] == [user2.name, "missing"]
+
+
 def test_post_user(gen_user, test_db_client, test_client, users_url):
     user = gen_user()
     user_dict = user.model_dump()
@@ -90,6 +240,80 @@ def test_post_user(gen_user, test_db_client, test_client, users_url):
     assert_datetime_equal(resp_json["created_at"], user_dict["created_at"])
 
 
+def test_post_users_bulk(gen_user, test_db_client, test_client, users_url):
+    user1, user2 = gen_user(), gen_user()
+
+    test_db_client.query.return_value = [
+        bulk_create_users_qry.BulkCreateUsersResult(
+            **user1.model_dump(include={"id", "name", "created_at"})
+        )
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.post(
+        f"{users_url}/bulk",
+        json=[
+            {"name": user1.name},
+            {"name": user2.name},
+            {"name": user1.name},
+            {"name": "x" * 51},
+            "not a user",
+        ],
+    )
+    resp_json = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert (resp_json["created"], resp_json["duplicate"], resp_json["invalid"]) == (
+        1,
+        2,
+        2,
+    )
+    assert [item["status"] for item in resp_json["items"]] == [
+        "created",
+        "duplicate",
+        "duplicate",
+        "invalid",
+        "invalid",
+    ]
+    assert resp_json["items"][1]["error"] == f"Username '{user2.name}' already exists."
+    assert resp_json["items"][3]["name"] == "x" * 51
+    assert test_db_client.query.call_args.kwargs["names"] == [user1.name, user2.name]
+
+
+def test_post_users_bulk_ndjson(
+    gen_user, test_db_client, test_client, users_url, mocker
+):
+    users = [gen_user() for _ in range(3)]
+
+    test_db_client.query.side_effect = lambda _, names: [
+        bulk_create_users_qry.BulkCreateUsersResult(
+            **user.model_dump(include={"id", "name", "created_at"})
+        )
+        for user in users
+        if user.name in names
+    ]
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+    mocker.patch.object(settings, "backend_bulk_chunk_size", 2)
+
+    body = "\n".join(json.dumps({"name": user.name}) for user in users)
+    response = test_client.post(
+        f"{users_url}/bulk",
+        content=f"{body}\n{{not json\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [(line["index"], line["status"]) for line in lines] == [
+        (0, "created"),
+        (1, "created"),
+        (2, "created"),
+        (3, "invalid"),
+    ]
+    assert test_db_client.query.call_count == 2
+
+
 def test_put_user(gen_user, test_db_client, test_client, users_url):
     user = gen_user()
     u_name_old, u_name_new = user.name, f"{user.name}_new"
@@ -149,6 +373,76 @@ def test_get_user_not_found(
     assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
 
 
+def test_get_users_page_invalid_cursor(
+    test_db_client, test_client, users_url, log_output
+):
+    after = "not-a-cursor"
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url, params={"after": after})
+    resp_json = response.json()
+    err_msg = f"Invalid cursor '{after}'."
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+    test_db_client.query.assert_not_called()
+
+
+def test_get_users_page_naive_cursor(
+    test_db_client, test_client, users_url, log_output
+):
+    after = encode_cursor("2010-12-27T23:59:59", uuid.uuid4())
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url, params={"after": after})
+    resp_json = response.json()
+    err_msg = f"Invalid cursor '{after}'."
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+    test_db_client.query.assert_not_called()
+
+
+def test_get_user_json_passthrough_not_found(
+    mocker, gen_user, test_db_client, test_client, users_url, log_output
+):
+    mocker.patch.object(settings, "backend_json_passthrough", True)
+    user = gen_user()
+
+    test_db_client.query_single_json.return_value = "null"
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.get(users_url, params={"name": user.name})
+    resp_json = response.json()
+    err_msg = f"Username '{user.name}' does not exist."
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+
+
+def test_get_users_by_keys_bad_request(
+    test_db_client, test_client, users_url, log_output, mocker
+):
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+    mocker.patch.object(settings, "backend_max_lookup_keys", 2)
+
+    response = test_client.get(users_url, params={"names": "a,b,c"})
+    resp_json = response.json()
+    err_msg = "At most 2 names and ids can be looked up at once."
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+
+    response = test_client.get(users_url, params={"ids": "not-a-uuid"})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"]["error"] == "Invalid ids 'not-a-uuid'."
+
+
 def test_post_user_bad_request(
     gen_user, test_db_client, test_client, users_url, log_output
 ):
@@ -166,6 +460,41 @@ def test_post_user_bad_request(
     assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
 
 
+def test_post_users_bulk_bad_request(
+    test_db_client, test_client, users_url, log_output
+):
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+
+    response = test_client.post(f"{users_url}/bulk", json={"name": "not a list"})
+    resp_json = response.json()
+    err_msg = "Body must be a JSON array."
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+
+
+def test_post_users_bulk_too_large(
+    test_db_client, test_client, users_url, log_output, mocker
+):
+    t_lifespan.registry.register_value(AsyncIOClient, test_db_client)
+    mocker.patch.object(settings, "backend_bulk_array_max_bytes", 16)
+
+    response = test_client.post(
+        f"{users_url}/bulk", json=[{"name": f"user{i}"} for i in range(3)]
+    )
+    resp_json = response.json()
+    err_msg = (
+        "A JSON array body is limited to 16 bytes, "
+        "send larger payloads as application/x-ndjson."
+    )
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert resp_json["detail"]["error"] == err_msg
+    assert log_output.entries[0] == {"event": err_msg, "log_level": "warning"}
+    test_db_client.query.assert_not_called()
+
+
 def test_put_user_not_found(
     gen_user, test_db_client, test_client, users_url, log_output
 ):
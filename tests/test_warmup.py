@@ -0,0 +1,99 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import edgedb
+import pytest
+
+from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from app.queries import get_users_async_edgeql as get_users_qry
+from app.warmup import (
+    WARM_UP_QUERIES,
+    _record_queries,
+    iter_query_modules,
+    warm_up_queries,
+)
+
+
+################################
+# Fixtures
+################################
+@pytest.fixture(scope="function")
+def tx():
+    tx = MagicMock()
+    tx.__aenter__.return_value = tx
+    tx.__aexit__.return_value = False
+    for method in ("query", "query_single", "query_json", "query_single_json"):
+        setattr(tx, method, AsyncMock(side_effect=edgedb.QueryArgumentError))
+    return tx
+
+
+@pytest.fixture(scope="function")
+def tx_db_client(tx):
+    async def transaction():
+        yield tx
+
+    return MagicMock(transaction=transaction)
+
+
+def _n_calls(tx, *methods):
+    return sum(getattr(tx, method).await_count for method in methods)
+
+
+def _sent_queries(tx, method):
+    return {call.args[0] for call in getattr(tx, method).await_args_list}
+
+
+################################
+# Good cases
+################################
+@pytest.mark.asyncio
+async def test_warm_up_queries(tx, tx_db_client):
+    n_modules = len(WARM_UP_QUERIES)
+    [(_, get_users_query)] = await _record_queries(get_users_qry)
+
+    n_queries = await warm_up_queries(tx_db_client)
+
+    assert n_queries == n_modules
+    assert _n_calls(tx, "query", "query_single") == n_modules
+    # The full scan takes no argument, so it would run.
+    assert get_users_query not in _sent_queries(tx, "query")
+    # Every transaction is rolled back.
+    assert tx.__aexit__.await_count == n_modules
+    assert all(call.args[0] is not None for call in tx.__aexit__.await_args_list)
+
+
+def test_warm_up_queries_exist():
+    labels = {
+        module.__name__.rpartition(".")[2].removesuffix("_async_edgeql")
+        for module in iter_query_modules()
+    }
+
+    assert WARM_UP_QUERIES <= labels
+
+
+@pytest.mark.asyncio
+async def test_warm_up_queries_json_passthrough(tx, tx_db_client):
+    n_modules = len(WARM_UP_QUERIES)
+    [(_, get_user_query)] = await _record_queries(get_user_by_name_qry)
+
+    n_queries = await warm_up_queries(tx_db_client, json_passthrough=True)
+
+    assert n_queries > n_modules
+    assert get_user_query in _sent_queries(tx, "query_single")
+    assert get_user_query in _sent_queries(tx, "query_single_json")
+
+
+################################
+# Bad cases
+################################
+@pytest.mark.asyncio
+async def test_warm_up_queries_failure(tx, tx_db_client, log_output):
+    n_modules = len(WARM_UP_QUERIES)
+    tx.query.side_effect = [
+        edgedb.InvalidReferenceError("object type 'default::User' does not exist"),
+        *[edgedb.QueryArgumentError] * n_modules,
+    ]
+
+    n_queries = await warm_up_queries(tx_db_client)
+
+    assert n_queries == n_modules - 1
+    assert "Warm-up of" in log_output.entries[-1]["event"]